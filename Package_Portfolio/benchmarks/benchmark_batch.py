@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the vectorized batch distance against a loop over the point classes
+
+Usage:
+    python benchmarks/benchmark_batch.py [n_points]
+"""
+
+import sys
+import time
+import numpy as np
+
+from pointdistance import GeodesicPoints, EuclideanPoints, batch_distance
+
+def random_coordinates(n_points, seed = 0):
+    """
+    Method for generating random (latitude, longitude) pairs
+
+    Args:
+        n_points (int): Number of coordinates
+        seed (int): Random seed
+
+    Returns:
+        coordinates (numpy.ndarray): (n_points, 2) array
+    """
+
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(-90, 90, n_points), rng.uniform(-180, 180, n_points)])
+
+def time_call(function, *args, **kwargs):
+    """
+    Method for timing a single call
+
+    Returns:
+        elapsed (float): Seconds taken
+        result: Return value of the call
+    """
+
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def main():
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    coordinates_1 = random_coordinates(n_points, seed = 0)
+    coordinates_2 = random_coordinates(n_points, seed = 1)
+
+    for metric, point_class in [("geodesic", GeodesicPoints), ("euclidean", EuclideanPoints)]:
+        pairs = list(zip(map(tuple, coordinates_1.tolist()), map(tuple, coordinates_2.tolist())))
+        loop_time, loop_result = time_call(lambda: [point_class(c_1, c_2).distance for c_1, c_2 in pairs])
+        batch_time, batch_result = time_call(batch_distance, coordinates_1, coordinates_2, metric = metric)
+
+        assert np.allclose(np.array(loop_result, dtype = np.float64), batch_result, atol = 1e-4)
+        print("{:10s} n={:,}  loop {:8.3f}s ({:12,.0f} pairs/s)  batch {:8.4f}s ({:14,.0f} pairs/s)  speedup {:6.1f}x"
+              .format(metric, n_points, loop_time, n_points / loop_time,
+                      batch_time, n_points / batch_time, loop_time / batch_time))
+
+if __name__ == '__main__':
+    main()
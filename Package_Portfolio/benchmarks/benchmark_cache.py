@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of a DistanceCache hit and miss against calculating the distance directly
+
+Usage:
+    python benchmarks/benchmark_cache.py [n_pairs]
+"""
+
+import sys
+import time
+import numpy as np
+
+from pointdistance import GeodesicPoints, EuclideanPoints, DistanceCache
+
+def per_call(function, pairs):
+    """
+    Method for timing a function over every pair
+
+    Returns:
+        microseconds (float): Mean time of one call in microseconds
+    """
+
+    start = time.perf_counter()
+    for coordinate_1, coordinate_2 in pairs:
+        function(coordinate_1, coordinate_2)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+def main():
+    n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    rng = np.random.default_rng(0)
+    coordinates = np.column_stack([rng.uniform(2.9, 3.3, (n_pairs, 2)), rng.uniform(101.5, 101.9, (n_pairs, 2))])
+    pairs = [((lat_1, lon_1), (lat_2, lon_2)) for lat_1, lat_2, lon_1, lon_2 in coordinates.tolist()]
+
+    cases = [("haversine", "geodesic", {}, lambda c_1, c_2: GeodesicPoints(c_1, c_2).distance),
+             ("equirectangular", "geodesic", {"method": "equirectangular"},
+              lambda c_1, c_2: GeodesicPoints(c_1, c_2, method = "equirectangular").distance),
+             ("vincenty", "geodesic", {"method": "vincenty"},
+              lambda c_1, c_2: GeodesicPoints(c_1, c_2, method = "vincenty").distance),
+             ("euclidean", "euclidean", {}, lambda c_1, c_2: EuclideanPoints(c_1, c_2).distance)]
+
+    print("n={:,} pairs, microseconds per call".format(n_pairs))
+    print("  {:16s} {:>8s} {:>8s} {:>8s} {:>8s}".format("", "direct", "key", "miss", "hit"))
+    for name, metric, kwargs, direct in cases:
+        cache = DistanceCache(metric = metric, maxsize = n_pairs, **kwargs)
+        direct_time = per_call(direct, pairs)
+        key_time = per_call(cache.key, pairs)
+        miss_time = per_call(cache, pairs)
+        hit_time = per_call(cache, pairs)
+        print("  {:16s} {:8.2f} {:8.2f} {:8.2f} {:8.2f}".format(name, direct_time, key_time, miss_time, hit_time))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the geodesic distance methods: throughput and error against the ellipsoid
+
+The reference is geographiclib (Karney) when it is installed, otherwise the
+vectorized Vincenty method.
+
+Usage:
+    python benchmarks/benchmark_geodesic_modes.py [n_points]
+"""
+
+import sys
+import time
+import numpy as np
+
+from pointdistance import geodesic_distances
+from pointdistance.BatchDistance import GEODESIC_METHODS
+
+def city_coordinates(n_points, seed):
+    """
+    Method for generating coordinates around Kuala Lumpur (about 50 km across)
+    """
+
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(2.9, 3.3, n_points), rng.uniform(101.5, 101.9, n_points)])
+
+def global_coordinates(n_points, seed):
+    """
+    Method for generating coordinates anywhere on earth
+    """
+
+    rng = np.random.default_rng(seed)
+    return np.column_stack([np.degrees(np.arcsin(rng.uniform(-1, 1, n_points))), rng.uniform(-180, 180, n_points)])
+
+def reference_distances(coordinates_1, coordinates_2):
+    """
+    Method for finding the ellipsoidal reference distance in km
+
+    Returns:
+        name (str): Name of the reference
+        distance (numpy.ndarray): Reference distances
+    """
+
+    try:
+        from geographiclib.geodesic import Geodesic
+    except ImportError:
+        return "vincenty", geodesic_distances(coordinates_1, coordinates_2, method = "vincenty")
+
+    distance = [Geodesic.WGS84.Inverse(lat_1, lon_1, lat_2, lon_2)["s12"] / 1000
+                for (lat_1, lon_1), (lat_2, lon_2) in zip(coordinates_1.tolist(), coordinates_2.tolist())]
+    return "karney", np.array(distance)
+
+def main():
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    for scale, generate in [("city", city_coordinates), ("global", global_coordinates)]:
+        coordinates_1 = generate(n_points, 0)
+        coordinates_2 = generate(n_points, 1)
+        reference_name, reference = reference_distances(coordinates_1, coordinates_2)
+        print("{} scale, n={:,}, reference {}".format(scale, n_points, reference_name))
+
+        for method in GEODESIC_METHODS:
+            start = time.perf_counter()
+            distance = geodesic_distances(coordinates_1, coordinates_2, method = method)
+            elapsed = time.perf_counter() - start
+
+            error = np.abs(distance - reference)
+            relative = error / np.maximum(reference, 1e-9)
+            print("  {:16s} {:14,.0f} pairs/s  max error {:10.4f} km  max relative error {:.3e}"
+                  .format(method, n_points / elapsed, error.max(), relative.max()))
+
+if __name__ == '__main__':
+    main()
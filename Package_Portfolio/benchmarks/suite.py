@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the pointdistance package
+
+Times scalar construction of the point classes, batch and pairwise distances at
+1e3 to 1e7 points and records the peak memory of every case. Results are saved as
+JSON so that runs can be compared over time.
+
+Usage:
+    python benchmarks/suite.py [--max-size 1e7] [--repeat 3] [--output results.json]
+    python benchmarks/suite.py --compare benchmarks/results/old.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+import pointdistance
+from pointdistance import GeodesicPoints, EuclideanPoints, batch_distance, cross_distance
+
+BATCH_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+# Creating point objects is about a million times slower per pair, keep it short
+SCALAR_SIZES = [10 ** 3, 10 ** 4, 10 ** 5]
+# Number of pairs of the (N, N) matrix
+PAIRWISE_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+
+def random_coordinates(n_points, seed):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(-90, 90, n_points), rng.uniform(-180, 180, n_points)])
+
+def scalar_case(point_class, n_points):
+    pairs = list(zip(map(tuple, random_coordinates(n_points, 0).tolist()),
+                     map(tuple, random_coordinates(n_points, 1).tolist())))
+    return lambda: [point_class(c_1, c_2).distance for c_1, c_2 in pairs]
+
+def batch_case(n_points, **kwargs):
+    coordinates_1 = random_coordinates(n_points, 0)
+    coordinates_2 = random_coordinates(n_points, 1)
+    return lambda: batch_distance(coordinates_1, coordinates_2, **kwargs)
+
+def pairwise_case(n_pairs, **kwargs):
+    n_points = int(round(math.sqrt(n_pairs)))
+    coordinates_1 = random_coordinates(n_points, 0)
+    coordinates_2 = random_coordinates(n_points, 1)
+    return lambda: cross_distance(coordinates_1, coordinates_2, **kwargs)
+
+def cases(max_size):
+    """
+    Method for listing the benchmark cases
+
+    Yields:
+        (name, n_pairs, setup): setup() builds the inputs and returns the timed callable
+    """
+
+    for n in SCALAR_SIZES:
+        if n <= max_size:
+            yield "scalar.GeodesicPoints", n, lambda n = n: scalar_case(GeodesicPoints, n)
+            yield "scalar.EuclideanPoints", n, lambda n = n: scalar_case(EuclideanPoints, n)
+    for n in BATCH_SIZES:
+        if n <= max_size:
+            for method in ["haversine", "equirectangular", "vincenty"]:
+                yield "batch.geodesic." + method, n, lambda n = n, method = method: batch_case(n, method = method)
+            yield "batch.euclidean", n, lambda n = n: batch_case(n, metric = "euclidean")
+    for n in PAIRWISE_SIZES:
+        if n <= max_size:
+            yield "pairwise.geodesic", n, lambda n = n: pairwise_case(n)
+            yield "pairwise.euclidean", n, lambda n = n: pairwise_case(n, metric = "euclidean")
+
+def measure(function, repeat):
+    """
+    Method for timing a callable and tracking its peak memory
+
+    Returns:
+        times (list): Seconds of every repeat
+        peak (int): Peak bytes allocated during one extra traced call
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # Traced separately, tracemalloc slows the call down
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return times, peak
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output = True, text = True,
+                                cwd = os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return {"timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "package": os.path.dirname(pointdistance.__file__)}
+
+def run(max_size, repeat):
+    results = []
+    for name, n_pairs, setup in cases(max_size):
+        times, peak = measure(setup(), repeat)
+        best = min(times)
+        results.append({"name": name,
+                        "n": n_pairs,
+                        "seconds": times,
+                        "best": best,
+                        "pairs_per_second": n_pairs / best,
+                        "peak_memory": peak})
+        print("{:32s} n={:>12,}  {:10.5f}s  {:14,.0f} pairs/s  peak {:10.1f} MB"
+              .format(name, n_pairs, best, n_pairs / best, peak / 2 ** 20), flush = True)
+    return results
+
+def compare(results, baseline):
+    """
+    Method for printing the change of every case against a saved run
+    """
+
+    previous = {(r["name"], r["n"]): r for r in baseline["results"]}
+    print("\nCompared with {} ({})".format(baseline["metadata"].get("commit", "")[:10],
+                                         baseline["metadata"].get("timestamp", "")))
+    for result in results:
+        old = previous.get((result["name"], result["n"]))
+        if old is None:
+            continue
+        print("{:32s} n={:>12,}  time x{:6.2f}  peak memory x{:6.2f}"
+              .format(result["name"], result["n"], result["best"] / old["best"],
+                      result["peak_memory"] / max(old["peak_memory"], 1)))
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark suite for pointdistance")
+    parser.add_argument("--max-size", type = float, default = 1e7, help = "largest number of pairs")
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--output", help = "JSON file, defaults to benchmarks/results/<timestamp>.json")
+    parser.add_argument("--compare", help = "JSON file of an earlier run")
+    args = parser.parse_args()
+
+    run_metadata = metadata()
+    results = run(int(args.max_size), args.repeat)
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok = True)
+    with open(output, "w") as f:
+        json.dump({"metadata": run_metadata, "results": results}, f, indent = 2)
+    print("\nSaved results to {}".format(output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    sys.exit(main())
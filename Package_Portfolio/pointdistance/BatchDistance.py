@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized distance calculations over arrays of coordinates
+
+@author: Reza
+"""
+
+import numpy as np
+
+EARTH_RADIUS = 6371 # radius of earth in km
+
+def as_coordinates(coordinates):
+    """
+    Method for converting coordinates into a float64 array of shape (..., 2)
+
+    Args:
+        coordinates (array-like): (N, 2) array, pandas DataFrame of two columns
+            or a single (2,) coordinate
+
+    Returns:
+        coordinates (numpy.ndarray): Coordinates with the pair on the last axis
+    """
+
+    coordinates = np.asarray(coordinates, dtype = np.float64)
+
+    if coordinates.ndim == 0 or coordinates.shape[-1] != 2:
+        raise ValueError("coordinates must have shape (N, 2) or (2,), got {}"
+                         .format(coordinates.shape))
+
+    return coordinates
+
+def valid_geodesic(coordinates):
+    """
+    Method for checking the latitude and longitude limits of coordinates
+
+    Args:
+        coordinates (numpy.ndarray): (..., 2) array of (latitude, longitude)
+
+    Returns:
+        valid (numpy.ndarray): Boolean mask, False where a coordinate is out of range
+    """
+
+    latitude = coordinates[..., 0]
+    longitude = coordinates[..., 1]
+
+    return (latitude >= -90) & (latitude <= 90) & (longitude >= -180) & (longitude <= 180)
+
+def mask_invalid(coordinates):
+    """
+    Method for replacing out of range geodesic coordinates with NaN
+
+    Args:
+        coordinates (numpy.ndarray): (..., 2) array of (latitude, longitude)
+
+    Returns:
+        coordinates (numpy.ndarray): Coordinates where invalid rows are NaN
+    """
+
+    valid = valid_geodesic(coordinates)
+    if valid.all():
+        return coordinates
+
+    return np.where(valid[..., None], coordinates, np.nan)
+
+def haversine(lat_1, lon_1, lat_2, lon_2):
+    """
+    Method for finding the haversine distance between coordinates in radians
+
+    Args:
+        lat_1, lon_1 (numpy.ndarray): Latitude and longitude of the first points in radians
+        lat_2, lon_2 (numpy.ndarray): Latitude and longitude of the second points in radians
+
+    Returns:
+        distance (numpy.ndarray): Distance in km, broadcast over the inputs
+    """
+
+    a = np.sin((lat_2 - lat_1) / 2) ** 2 + np.cos(lat_1) * np.cos(lat_2) \
+        * np.sin((lon_2 - lon_1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+# WGS-84 ellipsoid
+WGS84_A = 6378.137 # semi-major axis in km
+WGS84_F = 1 / 298.257223563 # flattening
+WGS84_B = (1 - WGS84_F) * WGS84_A # semi-minor axis in km
+
+def equirectangular(lat_1, lon_1, lat_2, lon_2):
+    """
+    Method for finding the flat earth (equirectangular) distance between coordinates in radians
+
+    Cheapest mode, accurate to well under 0.1% for city scale distances away from the poles.
+
+    Args:
+        lat_1, lon_1 (numpy.ndarray): Latitude and longitude of the first points in radians
+        lat_2, lon_2 (numpy.ndarray): Latitude and longitude of the second points in radians
+
+    Returns:
+        distance (numpy.ndarray): Distance in km, broadcast over the inputs
+    """
+
+    # Longitudes are within [-pi, pi], a difference across the antimeridian is wrapped
+    # with one subtraction, only when there is one
+    del_lon = np.asarray(lon_2 - lon_1, dtype = np.float64)
+    wrap = np.abs(del_lon) > np.pi
+    if wrap.any():
+        del_lon = np.where(wrap, del_lon - np.copysign(2 * np.pi, del_lon), del_lon)
+    x = del_lon * np.cos((lat_1 + lat_2) * 0.5)
+    y = lat_2 - lat_1
+
+    return EARTH_RADIUS * np.sqrt(x * x + y * y)
+
+def vincenty(lat_1, lon_1, lat_2, lon_2, max_iterations = 200, tolerance = 1e-12):
+    """
+    Method for finding the distance between coordinates in radians on the WGS-84 ellipsoid
+    Vincenty inverse formula
+
+    Only the pairs that have not converged are iterated. Nearly antipodal pairs where
+    the iteration does not converge fall back to the haversine distance.
+
+    Args:
+        lat_1, lon_1 (numpy.ndarray): Latitude and longitude of the first points in radians
+        lat_2, lon_2 (numpy.ndarray): Latitude and longitude of the second points in radians
+        max_iterations (int): Iteration limit for the longitude on the auxiliary sphere
+        tolerance (float): Convergence limit of the longitude in radians
+
+    Returns:
+        distance (numpy.ndarray): Distance in km, broadcast over the inputs
+    """
+
+    lat_1, lon_1, lat_2, lon_2 = np.broadcast_arrays(lat_1, lon_1, lat_2, lon_2)
+    shape = lat_1.shape
+    lat_1, lon_1, lat_2, lon_2 = [np.ravel(x) for x in (lat_1, lon_1, lat_2, lon_2)]
+
+    u_1 = np.arctan((1 - WGS84_F) * np.tan(lat_1))
+    u_2 = np.arctan((1 - WGS84_F) * np.tan(lat_2))
+    sin_u_1, cos_u_1 = np.sin(u_1), np.cos(u_1)
+    sin_u_2, cos_u_2 = np.sin(u_2), np.cos(u_2)
+    del_lon = np.remainder(lon_2 - lon_1 + np.pi, 2 * np.pi) - np.pi
+
+    def auxiliary(lam, i):
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_u_2[i] * sin_lam, cos_u_1[i] * sin_u_2[i] - sin_u_1[i] * cos_u_2[i] * cos_lam)
+        cos_sigma = sin_u_1[i] * sin_u_2[i] + cos_u_1[i] * cos_u_2[i] * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            sin_alpha = np.where(sin_sigma == 0, 0, cos_u_1[i] * cos_u_2[i] * sin_lam / sin_sigma)
+            cos_sq_alpha = 1 - sin_alpha ** 2
+            # Equatorial lines have cos_sq_alpha = 0
+            cos_2_sigma_m = np.where(cos_sq_alpha == 0, 0,
+                                     cos_sigma - 2 * sin_u_1[i] * sin_u_2[i] / cos_sq_alpha)
+        return sin_sigma, cos_sigma, sigma, sin_alpha, cos_sq_alpha, cos_2_sigma_m
+
+    lam = del_lon.copy()
+    active = np.flatnonzero(np.isfinite(lam) & np.isfinite(u_1) & np.isfinite(u_2))
+    for _ in range(max_iterations):
+        if active.size == 0:
+            break
+        sin_sigma, cos_sigma, sigma, sin_alpha, cos_sq_alpha, cos_2_sigma_m = auxiliary(lam[active], active)
+        c = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+        lam_next = del_lon[active] + (1 - c) * WGS84_F * sin_alpha \
+            * (sigma + c * sin_sigma * (cos_2_sigma_m + c * cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2)))
+        converged = np.abs(lam_next - lam[active]) <= tolerance
+        lam[active] = lam_next
+        active = active[~converged]
+
+    everything = np.arange(lam.size)
+    sin_sigma, cos_sigma, sigma, sin_alpha, cos_sq_alpha, cos_2_sigma_m = auxiliary(lam, everything)
+    u_sq = cos_sq_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    del_sigma = big_b * sin_sigma * (cos_2_sigma_m + big_b / 4 * (cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2)
+                - big_b / 6 * cos_2_sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2_sigma_m ** 2)))
+    distance = WGS84_B * big_a * (sigma - del_sigma)
+
+    if active.size:
+        distance[active] = haversine(lat_1[active], lon_1[active], lat_2[active], lon_2[active])
+
+    return distance.reshape(shape)
+
+GEODESIC_METHODS = {"haversine": haversine,
+                    "equirectangular": equirectangular,
+                    "vincenty": vincenty}
+
+def geodesic_distances(coordinates_1, coordinates_2, method = "haversine", decimals = None):
+    """
+    Method for finding the distance between geodesic points row by row
+
+    Out of range coordinates produce NaN for that row instead of raising.
+
+    Args:
+        coordinates_1 (array-like): (N, 2) array of (latitude, longitude)
+        coordinates_2 (array-like): (N, 2) array of (latitude, longitude)
+        method (str): "haversine" (sphere of radius 6371 km), "equirectangular"
+            (fast flat earth approximation for short distances) or "vincenty"
+            (WGS-84 ellipsoid)
+        decimals (int): Round the result like GeodesicPoints, None keeps full precision
+
+    Returns:
+        distance (numpy.ndarray): (N,) array of distances in km
+    """
+
+    if method not in GEODESIC_METHODS:
+        raise ValueError("method must be one of {}, got {!r}".format(sorted(GEODESIC_METHODS), method))
+
+    coordinates_1 = np.radians(mask_invalid(as_coordinates(coordinates_1)))
+    coordinates_2 = np.radians(mask_invalid(as_coordinates(coordinates_2)))
+
+    distance = GEODESIC_METHODS[method](coordinates_1[..., 0], coordinates_1[..., 1],
+                                        coordinates_2[..., 0], coordinates_2[..., 1])
+
+    if decimals is not None:
+        distance = np.round(distance, decimals)
+
+    return distance
+
+def euclidean_distances(coordinates_1, coordinates_2, decimals = None):
+    """
+    Method for finding the distance between euclidean points row by row
+
+    Args:
+        coordinates_1 (array-like): (N, 2) array of (x, y)
+        coordinates_2 (array-like): (N, 2) array of (x, y)
+        decimals (int): Round the result like EuclideanPoints, None keeps full precision
+
+    Returns:
+        distance (numpy.ndarray): (N,) array of distances
+    """
+
+    coordinates_1 = as_coordinates(coordinates_1)
+    coordinates_2 = as_coordinates(coordinates_2)
+
+    distance = np.hypot(coordinates_1[..., 0] - coordinates_2[..., 0],
+                        coordinates_1[..., 1] - coordinates_2[..., 1])
+
+    if decimals is not None:
+        distance = np.round(distance, decimals)
+
+    return distance
+
+METRICS = {"geodesic": geodesic_distances,
+           "euclidean": euclidean_distances}
+
+def batch_distance(coordinates_1, coordinates_2, metric = "geodesic", n_jobs = 1, min_parallel_size = None,
+                   **kwargs):
+    """
+    Method for finding the distance between two arrays of points in one vectorized pass
+
+    Args:
+        coordinates_1 (array-like): (N, 2) array or DataFrame of two columns
+        coordinates_2 (array-like): (N, 2) array or DataFrame of two columns,
+            a single (2,) point is broadcast against every row
+        metric (str): "geodesic" or "euclidean"
+        n_jobs (int): Processes to split the rows across, 1 runs serially and -1 uses every CPU
+        min_parallel_size (int): Inputs with fewer rows run serially even when n_jobs is not 1,
+            defaults to ParallelDistance.PARALLEL_MIN_SIZE
+        kwargs: Passed to the metric function
+
+    Returns:
+        distance (numpy.ndarray): (N,) array of distances
+    """
+
+    if metric not in METRICS:
+        raise ValueError("metric must be one of {}, got {!r}".format(sorted(METRICS), metric))
+
+    if n_jobs != 1:
+        from .ParallelDistance import PARALLEL_MIN_SIZE, parallel_distance
+
+        if min_parallel_size is None:
+            min_parallel_size = PARALLEL_MIN_SIZE
+        size = max(np.size(coordinates_1), np.size(coordinates_2)) // 2
+        if size >= min_parallel_size:
+            return parallel_distance(coordinates_1, coordinates_2, metric = metric, n_jobs = n_jobs, **kwargs)
+
+    return METRICS[metric](coordinates_1, coordinates_2, **kwargs)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Density based clustering of geodesic points
+
+@author: Reza
+"""
+
+import numpy as np
+
+from .SpatialIndex import GeodesicIndex
+
+def spherical_centroids(coordinates, labels, n_clusters):
+    """
+    Method for finding the centroid of every cluster on the sphere
+
+    The points are averaged as unit vectors so clusters across the antimeridian
+    are handled.
+
+    Args:
+        coordinates (numpy.ndarray): (N, 2) array of (latitude, longitude)
+        labels (numpy.ndarray): (N,) cluster label of every point, -1 for noise
+        n_clusters (int): Number of clusters
+
+    Returns:
+        centroids (numpy.ndarray): (n_clusters, 2) array of (latitude, longitude)
+    """
+
+    clustered = labels >= 0
+    latitude, longitude = np.radians(coordinates[clustered]).T
+    vectors = [np.cos(latitude) * np.cos(longitude), np.cos(latitude) * np.sin(longitude), np.sin(latitude)]
+    x, y, z = [np.bincount(labels[clustered], weights = v, minlength = n_clusters) for v in vectors]
+
+    return np.column_stack([np.degrees(np.arctan2(z, np.hypot(x, y))), np.degrees(np.arctan2(y, x))])
+
+class GeodesicDBSCAN:
+    """
+    The GeodesicDBSCAN groups (latitude, longitude) points by density, DBSCAN with the
+    haversine distance in km. Neighbours are found through a GeodesicIndex so every
+    point only measures the distance to the grid cells around it. The neighbour lists
+    of all points are held in memory as flat arrays
+    """
+
+    def __init__(self, eps = 1, min_samples = 5, cell_size = None):
+        """
+        Method for initializing the clustering
+
+        Args:
+            eps (float): Neighbourhood radius in km
+            min_samples (int): Points within eps, the point included, that make a core point
+            cell_size (float): Grid cell size of the index in km, defaults to eps
+
+        Attributes:
+            labels (numpy.ndarray): Cluster of every point after fit, -1 for noise
+            core (numpy.ndarray): True for the core points
+            centroids (numpy.ndarray): (n_clusters, 2) cluster centroids (latitude, longitude)
+            sizes (numpy.ndarray): Number of points in every cluster
+            n_clusters (int): Number of clusters found
+        """
+
+        if eps <= 0:
+            raise ValueError("eps must be positive, got {}".format(eps))
+        if min_samples < 1:
+            raise ValueError("min_samples must be at least 1, got {}".format(min_samples))
+
+        self.eps = eps
+        self.min_samples = min_samples
+        self.cell_size = cell_size
+
+    def fit(self, coordinates):
+        """
+        Method for clustering the points
+
+        Args:
+            coordinates (array-like): (N, 2) array or DataFrame of (latitude, longitude)
+
+        Returns:
+            self
+        """
+
+        index = GeodesicIndex(coordinates, cell_size = self.cell_size or self.eps)
+
+        # Work on the cell sorted positions of the index, neighbours are close in memory
+        indptr, neighbours = index._radius_graph(self.eps)
+        core = np.diff(indptr) >= self.min_samples
+        labels = np.full(len(index), -1, dtype = np.int64)
+
+        n_clusters = 0
+        for i in np.flatnonzero(core):
+            if labels[i] != -1:
+                continue
+            labels[i] = n_clusters
+            stack = [i]
+            while stack:
+                j = stack.pop()
+                found = neighbours[indptr[j]:indptr[j + 1]]
+                # Points reached from a core point join the cluster, only core points expand it
+                new = found[labels[found] == -1]
+                labels[new] = n_clusters
+                stack.extend(new[core[new]].tolist())
+            n_clusters += 1
+
+        n_points = len(index)
+        self.labels = np.empty(n_points, dtype = np.int64)
+        self.labels[index._order] = labels
+        self.core = np.empty(n_points, dtype = bool)
+        self.core[index._order] = core
+        self.n_clusters = n_clusters
+        self.centroids = spherical_centroids(index.coordinates, self.labels, n_clusters)
+        self.sizes = np.bincount(self.labels[self.labels >= 0], minlength = n_clusters)
+
+        return self
+
+    def fit_predict(self, coordinates):
+        """
+        Method for clustering the points and returning the labels
+        """
+
+        return self.fit(coordinates).labels
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+All-pairs distance matrix between two sets of points computed in row chunks
+
+@author: Reza
+"""
+
+import numpy as np
+
+from .BatchDistance import as_coordinates, batch_distance
+
+# Approximate number of float64 temporaries alive per matrix element while a chunk is computed
+CHUNK_TEMPORARIES = 8
+
+def chunk_rows(n_columns, memory_budget):
+    """
+    Method for finding how many matrix rows fit into the memory budget
+
+    Args:
+        n_columns (int): Number of columns in the distance matrix
+        memory_budget (int): Bytes available for temporaries of one chunk
+
+    Returns:
+        rows (int): Rows per chunk, at least 1
+    """
+
+    bytes_per_row = max(n_columns, 1) * np.dtype(np.float64).itemsize * CHUNK_TEMPORARIES
+    return max(1, int(memory_budget // bytes_per_row))
+
+def prepare_output(out, shape):
+    """
+    Method for creating or checking the output distance matrix
+
+    Args:
+        out (None, numpy.ndarray or str): None allocates in memory, an array is written
+            in place, a str is the path of a .npy file opened as a memory map
+        shape (tuple): (N, M) shape of the distance matrix
+
+    Returns:
+        out (numpy.ndarray): Array to write the distances into
+    """
+
+    if out is None:
+        return np.empty(shape, dtype = np.float64)
+
+    if isinstance(out, str):
+        return np.lib.format.open_memmap(out, mode = "w+", dtype = np.float64, shape = shape)
+
+    if out.shape != shape:
+        raise ValueError("out must have shape {}, got {}".format(shape, out.shape))
+    if not np.issubdtype(out.dtype, np.floating):
+        raise ValueError("out must have a floating point dtype, got {}".format(out.dtype))
+
+    return out
+
+def cross_distance(coordinates_1, coordinates_2, metric = "geodesic", memory_budget = 2 ** 28,
+                   out = None, **kwargs):
+    """
+    Method for finding the distance between every point of two sets of points
+
+    The matrix is filled a block of rows at a time so that the temporaries of one
+    block stay within memory_budget. Together with a memory mapped out the full
+    matrix never has to fit in RAM.
+
+    Args:
+        coordinates_1 (array-like): (N, 2) array or DataFrame of two columns
+        coordinates_2 (array-like): (M, 2) array or DataFrame of two columns
+        metric (str): "geodesic" or "euclidean"
+        memory_budget (int): Bytes of temporaries allowed per chunk (default 256 MB)
+        out (None, numpy.ndarray or str): Output array, memory map, or .npy path
+        kwargs: Passed to the metric function
+
+    Returns:
+        distance (numpy.ndarray): (N, M) matrix, distance[i, j] between
+            coordinates_1[i] and coordinates_2[j]
+    """
+
+    coordinates_1 = as_coordinates(coordinates_1).reshape(-1, 2)
+    coordinates_2 = as_coordinates(coordinates_2).reshape(-1, 2)
+    n_rows, n_columns = len(coordinates_1), len(coordinates_2)
+
+    out = prepare_output(out, (n_rows, n_columns))
+    rows = chunk_rows(n_columns, memory_budget)
+
+    for start in range(0, n_rows, rows):
+        stop = min(start + rows, n_rows)
+        out[start:stop] = batch_distance(coordinates_1[start:stop, None, :], coordinates_2[None, :, :],
+                                         metric = metric, **kwargs)
+
+    if isinstance(out, np.memmap):
+        out.flush()
+
+    return out
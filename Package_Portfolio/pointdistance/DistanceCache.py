@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Memoization of distances between repeated coordinate pairs
+
+@author: Reza
+"""
+
+from collections import OrderedDict, namedtuple
+
+from .PointDistance import GeodesicPoints, EuclideanPoints
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Marks a pair that is not cached, None is a valid geodesic distance
+_MISSING = object()
+
+class DistanceCache:
+    """
+    The DistanceCache remembers the distance of coordinate pairs with least recently
+    used eviction. Coordinates are rounded before lookup and a pair is stored once for
+    both orders, so (a, b) and (b, a) hit the same entry. A hit costs about as much
+    as one haversine distance, so the cache pays off for the vincenty method and
+    not for the haversine, equirectangular or euclidean distances
+    """
+
+    point_classes = {"geodesic": GeodesicPoints,
+                     "euclidean": EuclideanPoints}
+
+    def __init__(self, metric = "geodesic", maxsize = 65536, decimals = 6, **kwargs):
+        """
+        Method for initializing a DistanceCache
+
+        Args:
+            metric (str): "geodesic" or "euclidean"
+            maxsize (int): Number of pairs kept before the least recently used is evicted
+            decimals (int): Decimals the coordinates are rounded to for the key
+            kwargs: Passed to the point class, e.g. method = "vincenty"
+
+        Attributes:
+            hits (int): Lookups answered from the cache
+            misses (int): Lookups that calculated the distance
+        """
+
+        if metric not in self.point_classes:
+            raise ValueError("metric must be one of {}, got {!r}".format(sorted(self.point_classes), metric))
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1, got {}".format(maxsize))
+
+        self.point_class = self.point_classes[metric]
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._scale = 10.0 ** decimals
+        self.kwargs = kwargs
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def key(self, coordinate_1, coordinate_2):
+        """
+        Method for building the symmetric key of a pair
+
+        The coordinates are scaled by 10 ** decimals and rounded to integers, which
+        is several times cheaper than round(x, decimals).
+
+        Returns:
+            key (tuple): Rounded coordinates as integers, smallest first
+
+        Raises:
+            ValueError, OverflowError: NaN or infinite coordinates
+        """
+
+        (a_1, b_1), (a_2, b_2) = coordinate_1, coordinate_2
+        scale = self._scale
+        coordinate_1 = (round(a_1 * scale), round(b_1 * scale))
+        coordinate_2 = (round(a_2 * scale), round(b_2 * scale))
+        return (coordinate_1, coordinate_2) if coordinate_1 <= coordinate_2 else (coordinate_2, coordinate_1)
+
+    def distance(self, coordinate_1, coordinate_2):
+        """
+        Method for finding the distance between two points through the cache
+
+        A miss calculates the distance of the rounded coordinates. Pairs with NaN or
+        infinite coordinates are calculated and not cached.
+
+        Args:
+            coordinate_1 (tuple): Coordinates of the first point
+            coordinate_2 (tuple): Coordinates of the second point
+
+        Returns:
+            distance (float): Distance like the point class returns it
+        """
+
+        try:
+            key = self.key(coordinate_1, coordinate_2)
+        except (ValueError, OverflowError):
+            self.misses += 1
+            return self.point_class(coordinate_1, coordinate_2, **self.kwargs).distance
+
+        cache = self._cache
+        distance = cache.get(key, _MISSING)
+        if distance is _MISSING:
+            self.misses += 1
+            scale = self._scale
+            distance = self.point_class((key[0][0] / scale, key[0][1] / scale),
+                                        (key[1][0] / scale, key[1][1] / scale), **self.kwargs).distance
+            cache[key] = distance
+            if len(cache) > self.maxsize:
+                cache.popitem(last = False)
+            return distance
+
+        self.hits += 1
+        cache.move_to_end(key)
+        return distance
+
+    __call__ = distance
+
+    def __len__(self):
+        return len(self._cache)
+
+    def cache_info(self):
+        """
+        Method for reporting the cache statistics
+
+        Returns:
+            CacheInfo: (hits, misses, maxsize, currsize)
+        """
+
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    @property
+    def hit_rate(self):
+        """
+        Share of lookups answered from the cache
+        """
+
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """
+        Method for removing every entry and resetting the statistics
+        """
+
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-process distance calculation over shared memory buffers
+
+@author: Reza
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .BatchDistance import as_coordinates, batch_distance
+
+# Below this many pairs the process start up costs more than it saves
+PARALLEL_MIN_SIZE = 1000000
+
+def _distance_chunk(names, n_points, start, stop, metric, kwargs):
+    """
+    Method run by a worker process, computes one slice of the shared buffers in place
+    """
+
+    buffers = [shared_memory.SharedMemory(name = name) for name in names]
+    try:
+        coordinates_1 = np.ndarray((n_points, 2), dtype = np.float64, buffer = buffers[0].buf)
+        coordinates_2 = np.ndarray((n_points, 2), dtype = np.float64, buffer = buffers[1].buf)
+        out = np.ndarray((n_points,), dtype = np.float64, buffer = buffers[2].buf)
+        out[start:stop] = batch_distance(coordinates_1[start:stop], coordinates_2[start:stop],
+                                         metric = metric, **kwargs)
+        del coordinates_1, coordinates_2, out
+    finally:
+        for buffer in buffers:
+            buffer.close()
+
+def parallel_distance(coordinates_1, coordinates_2, metric = "geodesic", n_jobs = -1, chunk_size = None,
+                      executor = None, **kwargs):
+    """
+    Method for finding the distance between two arrays of points on several processes
+
+    The coordinates are copied once into shared memory, every worker computes a slice
+    of rows and writes it straight into a shared output buffer, so the arrays are never
+    pickled. On platforms that spawn processes call it under if __name__ == '__main__'.
+
+    Args:
+        coordinates_1 (array-like): (N, 2) array or DataFrame of two columns
+        coordinates_2 (array-like): (N, 2) array or DataFrame of two columns, or a single point
+        metric (str): "geodesic" or "euclidean"
+        n_jobs (int): Number of processes, -1 uses every CPU
+        chunk_size (int): Rows per task, by default four tasks per process
+        executor (concurrent.futures.Executor): Reuse an existing process pool
+        kwargs: Passed to the metric function
+
+    Returns:
+        distance (numpy.ndarray): Distances with the broadcast shape of the inputs
+    """
+
+    coordinates_1, coordinates_2 = np.broadcast_arrays(as_coordinates(coordinates_1), as_coordinates(coordinates_2))
+    shape = coordinates_1.shape[:-1]
+    coordinates_1 = coordinates_1.reshape(-1, 2)
+    coordinates_2 = coordinates_2.reshape(-1, 2)
+    n_points = len(coordinates_1)
+
+    n_jobs = os.cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
+    if chunk_size is None:
+        chunk_size = max(1, -(-n_points // (n_jobs * 4)))
+
+    itemsize = np.dtype(np.float64).itemsize
+    buffers = [shared_memory.SharedMemory(create = True, size = max(size, 1))
+               for size in (n_points * 2 * itemsize, n_points * 2 * itemsize, n_points * itemsize)]
+    try:
+        np.ndarray((n_points, 2), dtype = np.float64, buffer = buffers[0].buf)[:] = coordinates_1
+        np.ndarray((n_points, 2), dtype = np.float64, buffer = buffers[1].buf)[:] = coordinates_2
+
+        names = [buffer.name for buffer in buffers]
+        pool = executor if executor is not None else ProcessPoolExecutor(max_workers = n_jobs)
+        try:
+            futures = [pool.submit(_distance_chunk, names, n_points, start, min(start + chunk_size, n_points),
+                                   metric, kwargs)
+                       for start in range(0, n_points, chunk_size)]
+            for future in futures:
+                future.result()
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+        distance = np.ndarray((n_points,), dtype = np.float64, buffer = buffers[2].buf).copy()
+    finally:
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+
+    return distance.reshape(shape)
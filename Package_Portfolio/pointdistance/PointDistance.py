@@ -7,11 +7,105 @@ Created on Mon Jul 27 20:35:30 2020
 
 import math
 
+from .BatchDistance import GEODESIC_METHODS, WGS84_A, WGS84_B, WGS84_F
+
+# Marks a distance that has not been calculated yet, None is a valid geodesic result
+_UNSET = object()
+
+def haversine_distance(lat_1, lon_1, lat_2, lon_2):
+    """
+    Method for finding the haversine distance between two coordinates in degrees
+
+    Returns:
+        distance (float): Distance in km
+    """
+
+    radius = 6371 # radius of earth in km
+    del_lat = math.radians(lat_2-lat_1)
+    del_lon = math.radians(lon_2-lon_1)
+    a = math.sin(del_lat/2) * math.sin(del_lat/2) + math.cos(math.radians(lat_1)) \
+        * math.cos(math.radians(lat_2)) * math.sin(del_lon/2) * math.sin(del_lon/2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return radius * c
+
+def equirectangular_distance(lat_1, lon_1, lat_2, lon_2):
+    """
+    Method for finding the flat earth (equirectangular) distance between two coordinates in degrees
+    Same formula as BatchDistance.equirectangular without the NumPy overhead of one pair
+
+    Returns:
+        distance (float): Distance in km
+    """
+
+    lat_1, lon_1, lat_2, lon_2 = map(math.radians, (lat_1, lon_1, lat_2, lon_2))
+    del_lon = lon_2 - lon_1
+    if abs(del_lon) > math.pi:
+        del_lon -= math.copysign(2 * math.pi, del_lon)
+    x = del_lon * math.cos((lat_1 + lat_2) * 0.5)
+    y = lat_2 - lat_1
+    return 6371 * math.sqrt(x * x + y * y)
+
+def vincenty_distance(lat_1, lon_1, lat_2, lon_2, max_iterations = 200, tolerance = 1e-12):
+    """
+    Method for finding the distance between two coordinates in degrees on the WGS-84 ellipsoid
+    Same formula as BatchDistance.vincenty without the NumPy overhead of one pair
+
+    Returns:
+        distance (float): Distance in km, the haversine distance when the iteration
+            does not converge for nearly antipodal points
+    """
+
+    phi_1, phi_2 = math.radians(lat_1), math.radians(lat_2)
+    u_1 = math.atan((1 - WGS84_F) * math.tan(phi_1))
+    u_2 = math.atan((1 - WGS84_F) * math.tan(phi_2))
+    sin_u_1, cos_u_1 = math.sin(u_1), math.cos(u_1)
+    sin_u_2, cos_u_2 = math.sin(u_2), math.cos(u_2)
+    del_lon = math.remainder(math.radians(lon_2) - math.radians(lon_1), 2 * math.pi)
+
+    def auxiliary(lam):
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        sin_sigma = math.hypot(cos_u_2 * sin_lam, cos_u_1 * sin_u_2 - sin_u_1 * cos_u_2 * cos_lam)
+        cos_sigma = sin_u_1 * sin_u_2 + cos_u_1 * cos_u_2 * cos_lam
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = 0 if sin_sigma == 0 else cos_u_1 * cos_u_2 * sin_lam / sin_sigma
+        cos_sq_alpha = 1 - sin_alpha ** 2
+        # Equatorial lines have cos_sq_alpha = 0
+        cos_2_sigma_m = 0 if cos_sq_alpha == 0 else cos_sigma - 2 * sin_u_1 * sin_u_2 / cos_sq_alpha
+        return sin_sigma, cos_sigma, sigma, sin_alpha, cos_sq_alpha, cos_2_sigma_m
+
+    lam = del_lon
+    for _ in range(max_iterations):
+        sin_sigma, cos_sigma, sigma, sin_alpha, cos_sq_alpha, cos_2_sigma_m = auxiliary(lam)
+        c = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+        lam_next = del_lon + (1 - c) * WGS84_F * sin_alpha \
+            * (sigma + c * sin_sigma * (cos_2_sigma_m + c * cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2)))
+        converged = abs(lam_next - lam) <= tolerance
+        lam = lam_next
+        if converged:
+            break
+    else:
+        return haversine_distance(lat_1, lon_1, lat_2, lon_2)
+
+    sin_sigma, cos_sigma, sigma, sin_alpha, cos_sq_alpha, cos_2_sigma_m = auxiliary(lam)
+    u_sq = cos_sq_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    del_sigma = big_b * sin_sigma * (cos_2_sigma_m + big_b / 4 * (cos_sigma * (-1 + 2 * cos_2_sigma_m ** 2)
+                - big_b / 6 * cos_2_sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2_sigma_m ** 2)))
+    return WGS84_B * big_a * (sigma - del_sigma)
+
+# Scalar formulas of GeodesicPoints, the vectorized ones are in BatchDistance
+SCALAR_METHODS = {"haversine": haversine_distance,
+                  "equirectangular": equirectangular_distance,
+                  "vincenty": vincenty_distance}
+
 class Points:
     """
     The Parent Points class represents two points in euclidean plane or geodesic plane
     """
 
+    __slots__ = ("coordinate_1", "coordinate_2", "_distance")
+
     def __init__(self, coordinate_1, coordinate_2):
         """
         Method for initializing a Point Class
@@ -19,107 +113,125 @@ class Points:
         Args:
             coordinate_1 (tuple)
             coordinate_2 (tuple)
-            distance (float)
 
         Attributes:
             coordinate_1 (tuple): Coordinates in euclidean or geodesic plane
             coordinate_2 (tuple): Coordinates in euclidean or geodesic plane
-            distance(float): Distance between two points
+            distance(float): Distance between two points, calculated on first access
         """
 
         self.coordinate_1 = coordinate_1
         self.coordinate_2 = coordinate_2
-        self.distance = math.nan
+        self._distance = _UNSET
+
+    @property
+    def distance(self):
+        """
+        Distance between two points, calculated once on first access
+        """
+
+        if self._distance is _UNSET:
+            self._distance = self.calculate_distance()
+        return self._distance
+
+    @distance.setter
+    def distance(self, distance):
+        self._distance = distance
+
+    def calculate_distance(self):
+        """
+        Method for finding the distance between two points
+        """
+
+        return math.nan
 
 class GeodesicPoints(Points):
     """
     The GeodesicPoints represents points in geodesic plane
     """
 
-    def __init__(self, coordinate_1, coordinate_2):
+    __slots__ = ("method",)
+
+    def __init__(self, coordinate_1, coordinate_2, method = "haversine"):
         """
         Method for initializing two geodesic points
 
         Args:
             coordinate_1 (tuple): (latitude, longitude)
             coordinate_2 (tuple): (latitude, longitude)
-            distance (float)
+            method (str): "haversine", "equirectangular" or "vincenty"
 
         Attributes:
             coordinate_1 (tuple): Coordinates in geodesic plane
             coordinate_2 (tuple): Coordinates in geodesic plane
+            method (str): Formula used for the distance
             distance(float): Distance between two geodesic points
         """
 
+        if method not in GEODESIC_METHODS:
+            raise ValueError("method must be one of {}, got {!r}".format(sorted(GEODESIC_METHODS), method))
+
         Points.__init__(self, coordinate_1, coordinate_2)
+        self.method = method
+
+    def calculate_distance(self):
+        return self.geodesic_distance()
+
+    def geodesic_distance(self):
         """
-        Methods for inheriting Points class
+        Method for finding the distance between two geodesic points
+        Haversine Formula by default, see SCALAR_METHODS for the others
         """
-        
-        def geodesic_distance(self):
-            """
-            Method for finding the distance between two geodesic points
-            Haversine Formula
-            """
-
-            lat_1, lon_1 = self.coordinate_1
-            lat_2, lon_2 = self.coordinate_2
-            radius = 6371 # radius of earth in km
-            
-            # Check the limits of the coordinates
-            coordinate_limit = [lat_1 >= -90,
-                                lat_1 <= 90,
-                                lat_2 >= -90,
-                                lat_2 <= 90,
-                                lon_1 >= -180,
-                                lon_1 <= 180,
-                                lon_2 >= -180,
-                                lon_2 <= 180]
-        
-            if all(coordinate_limit):
-                del_lat = math.radians(lat_2-lat_1)
-                del_lon = math.radians(lon_2-lon_1)
-                a = math.sin(del_lat/2) * math.sin(del_lat/2) + math.cos(math.radians(lat_1)) \
-                    * math.cos(math.radians(lat_2)) * math.sin(del_lon/2) * math.sin(del_lon/2)
-                c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-                return round(radius * c, 4)
-        
-        # Assign distance to the class
-        self.distance = geodesic_distance(self)
-             
+
+        lat_1, lon_1 = self.coordinate_1
+        lat_2, lon_2 = self.coordinate_2
+
+        # Check the limits of the coordinates
+        coordinate_limit = [lat_1 >= -90,
+                            lat_1 <= 90,
+                            lat_2 >= -90,
+                            lat_2 <= 90,
+                            lon_1 >= -180,
+                            lon_1 <= 180,
+                            lon_2 >= -180,
+                            lon_2 <= 180]
+
+        if not all(coordinate_limit):
+            return None
+
+        return round(SCALAR_METHODS[self.method](lat_1, lon_1, lat_2, lon_2), 4)
+
 class EuclideanPoints(Points):
     """
     The EuclideanPoints represents points in euclidean plane
     """
 
+    __slots__ = ()
+
     def __init__(self, coordinate_1, coordinate_2):
         """
-        Method for initializing two geodesic points
+        Method for initializing two euclidean points
 
         Args:
             coordinate_1 (tuple): (x, y)
             coordinate_2 (tuple): (x, y)
-            distance (float)
 
         Attributes:
             coordinate_1 (tuple): Coordinates in euclidean plane
             coordinate_2 (tuple): Coordinates in euclidean plane
             distance(float): Distance between two points
         """
-        
+
         Points.__init__(self, coordinate_1, coordinate_2)
+
+    def calculate_distance(self):
+        return self.euclidean_distance()
+
+    def euclidean_distance(self):
         """
-        Methods for inheriting Points class
+        Method for finding the distance between two euclidean points
         """
-        
-        def euclidean_distance(self):
-            """
-            Method for finding the distance between two euclidean points
-            """
-
-            x_1, y_1 = self.coordinate_1
-            x_2, y_2 = self.coordinate_2
-            return round(math.sqrt((x_1-x_2)**2 + (y_1-y_2)**2), 4)
-        
-        # Assign distance to the class
-        self.distance = euclidean_distance(self)
\ No newline at end of file
+
+        x_1, y_1 = self.coordinate_1
+        x_2, y_2 = self.coordinate_2
+        return round(math.sqrt((x_1-x_2)**2 + (y_1-y_2)**2), 4)
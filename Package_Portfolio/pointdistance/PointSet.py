@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar containers of coordinate pairs backed by contiguous float64 arrays
+
+@author: Reza
+"""
+
+import numpy as np
+
+from .BatchDistance import GEODESIC_METHODS, as_coordinates, geodesic_distances, euclidean_distances
+from .PointDistance import Points, GeodesicPoints, EuclideanPoints
+
+class PointSet:
+    """
+    The Parent PointSet class holds many pairs of points as two (N, 2) float64 arrays,
+    the columnar counterpart of Points
+    """
+
+    point_class = Points
+
+    def __init__(self, coordinates_1, coordinates_2):
+        """
+        Method for initializing a PointSet
+
+        Args:
+            coordinates_1 (array-like): (N, 2) array or DataFrame of two columns
+            coordinates_2 (array-like): (N, 2) array or DataFrame of two columns
+
+        Attributes:
+            coordinates_1 (numpy.ndarray): C-contiguous (N, 2) float64 array
+            coordinates_2 (numpy.ndarray): C-contiguous (N, 2) float64 array
+            distance (numpy.ndarray): (N,) distances, calculated on first access
+        """
+
+        self.coordinates_1 = np.ascontiguousarray(as_coordinates(coordinates_1).reshape(-1, 2))
+        self.coordinates_2 = np.ascontiguousarray(as_coordinates(coordinates_2).reshape(-1, 2))
+        if self.coordinates_1.shape != self.coordinates_2.shape:
+            raise ValueError("coordinates_1 and coordinates_2 must have the same shape, got {} and {}"
+                             .format(self.coordinates_1.shape, self.coordinates_2.shape))
+        self._distance = None
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Method for building a PointSet from Points objects
+
+        Args:
+            points (iterable): Points objects
+
+        Returns:
+            PointSet
+        """
+
+        points = list(points)
+        return cls([p.coordinate_1 for p in points], [p.coordinate_2 for p in points])
+
+    def __len__(self):
+        return len(self.coordinates_1)
+
+    def __getitem__(self, index):
+        """
+        Method for selecting pairs
+
+        Returns:
+            Points object for an integer index, otherwise a PointSet of the selection
+        """
+
+        if isinstance(index, (int, np.integer)):
+            return self.point_class(tuple(self.coordinates_1[index].tolist()),
+                                    tuple(self.coordinates_2[index].tolist()), **self.options)
+
+        return type(self)(self.coordinates_1[index], self.coordinates_2[index], **self.options)
+
+    @property
+    def options(self):
+        """
+        Keyword arguments shared with the point class and selections of the set
+        """
+
+        return {}
+
+    @property
+    def nbytes(self):
+        """
+        Bytes used by the coordinate arrays
+        """
+
+        return self.coordinates_1.nbytes + self.coordinates_2.nbytes
+
+    @property
+    def distance(self):
+        """
+        Distance of every pair, calculated once over the whole set on first access
+        """
+
+        if self._distance is None:
+            self._distance = self.calculate_distance()
+        return self._distance
+
+    def calculate_distance(self):
+        """
+        Method for finding the distance of every pair
+        """
+
+        return np.full(len(self), np.nan)
+
+class GeodesicPointSet(PointSet):
+    """
+    The GeodesicPointSet holds pairs of (latitude, longitude) points
+    Out of range pairs have a NaN distance
+    """
+
+    point_class = GeodesicPoints
+
+    def __init__(self, coordinates_1, coordinates_2, method = "haversine"):
+        """
+        Method for initializing a GeodesicPointSet
+
+        Args:
+            coordinates_1 (array-like): (N, 2) array of (latitude, longitude)
+            coordinates_2 (array-like): (N, 2) array of (latitude, longitude)
+            method (str): "haversine", "equirectangular" or "vincenty"
+        """
+
+        if method not in GEODESIC_METHODS:
+            raise ValueError("method must be one of {}, got {!r}".format(sorted(GEODESIC_METHODS), method))
+
+        PointSet.__init__(self, coordinates_1, coordinates_2)
+        self.method = method
+
+    @property
+    def options(self):
+        return {"method": self.method}
+
+    def calculate_distance(self):
+        return geodesic_distances(self.coordinates_1, self.coordinates_2, method = self.method)
+
+class EuclideanPointSet(PointSet):
+    """
+    The EuclideanPointSet holds pairs of (x, y) points
+    """
+
+    point_class = EuclideanPoints
+
+    def calculate_distance(self):
+        return euclidean_distances(self.coordinates_1, self.coordinates_2)
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Grid bucket index for k-nearest and radius queries over geodesic points
+
+@author: Reza
+"""
+
+import math
+import numpy as np
+
+from .BatchDistance import EARTH_RADIUS, as_coordinates, valid_geodesic, haversine
+
+class GeodesicIndex:
+    """
+    The GeodesicIndex buckets (latitude, longitude) points into a grid of cells so
+    that k-nearest and radius queries only measure the haversine distance to points
+    in the cells around the query instead of every point
+    """
+
+    def __init__(self, coordinates, cell_size = 10):
+        """
+        Method for building the index
+
+        Args:
+            coordinates (array-like): (N, 2) array of (latitude, longitude)
+            cell_size (float): Height of a grid cell in km, about the typical query radius
+
+        Attributes:
+            coordinates (numpy.ndarray): Indexed coordinates in the original order
+            cell_size (float): Height of a grid cell in km
+        """
+
+        coordinates = as_coordinates(coordinates).reshape(-1, 2)
+        if not valid_geodesic(coordinates).all():
+            raise ValueError("coordinates must be within latitude [-90, 90] and longitude [-180, 180]")
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive, got {}".format(cell_size))
+
+        self.coordinates = coordinates
+        self.cell_size = cell_size
+
+        self._cell_degrees = min(math.degrees(cell_size / EARTH_RADIUS), 180.0)
+        self._n_rows = math.ceil(180 / self._cell_degrees)
+        self._n_columns = math.ceil(360 / self._cell_degrees)
+
+        # Sort the points by cell so that every cell, and every run of cells in a row,
+        # is a contiguous slice found with searchsorted
+        cells = self._row(coordinates[:, 0]) * self._n_columns + self._column(coordinates[:, 1])
+        self._order = np.argsort(cells, kind = "stable")
+        self._cells = cells[self._order]
+        self._radians = np.ascontiguousarray(np.radians(coordinates[self._order]))
+
+    def __len__(self):
+        return len(self._order)
+
+    def _row(self, latitude):
+        return np.clip(np.floor((np.asarray(latitude) + 90) / self._cell_degrees).astype(np.int64),
+                       0, self._n_rows - 1)
+
+    def _column(self, longitude):
+        return np.clip(np.floor((np.asarray(longitude) + 180) / self._cell_degrees).astype(np.int64),
+                       0, self._n_columns - 1)
+
+    def _cell_ranges(self, latitude, longitude, radius):
+        """
+        Method for finding the ranges of cell ids that cover a circle
+
+        Returns:
+            ranges (list): (first_cell, last_cell) pairs, inclusive
+        """
+
+        angle = radius / EARTH_RADIUS
+        if angle >= math.pi:
+            return [(0, self._n_rows * self._n_columns - 1)]
+
+        degrees = math.degrees(angle) * (1 + 1e-9) + 1e-9
+        row_first = int(self._row(latitude - degrees))
+        row_last = int(self._row(latitude + degrees))
+
+        # A circle that reaches a pole covers every longitude
+        if latitude - degrees <= -90 or latitude + degrees >= 90:
+            return [(row_first * self._n_columns, (row_last + 1) * self._n_columns - 1)]
+
+        # Widest longitude difference inside a circle that does not contain a pole
+        delta = math.degrees(math.asin(min(math.sin(angle) / math.cos(math.radians(latitude)), 1)))
+        delta = delta * (1 + 1e-9) + 1e-9
+        if delta >= 180:
+            return [(row_first * self._n_columns, (row_last + 1) * self._n_columns - 1)]
+
+        west, east = longitude - delta, longitude + delta
+        if west < -180:
+            columns = [(int(self._column(west + 360)), self._n_columns - 1), (0, int(self._column(east)))]
+        elif east > 180:
+            columns = [(int(self._column(west)), self._n_columns - 1), (0, int(self._column(east - 360)))]
+        else:
+            columns = [(int(self._column(west)), int(self._column(east)))]
+
+        return [(row * self._n_columns + first, row * self._n_columns + last)
+                for row in range(row_first, row_last + 1) for first, last in columns]
+
+    def _within(self, latitude, longitude, radius):
+        """
+        Method for finding the sorted positions and distances of points within radius km
+
+        Returns:
+            positions (numpy.ndarray): Positions into the cell-sorted arrays
+            distance (numpy.ndarray): Distance in km of each position
+        """
+
+        ranges = np.array(self._cell_ranges(latitude, longitude, radius), dtype = np.int64)
+        starts = np.searchsorted(self._cells, ranges[:, 0], side = "left")
+        stops = np.searchsorted(self._cells, ranges[:, 1], side = "right")
+        positions = np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)])
+
+        distance = haversine(math.radians(latitude), math.radians(longitude),
+                             self._radians[positions, 0], self._radians[positions, 1])
+        keep = distance <= radius
+
+        return positions[keep], distance[keep]
+
+    def _column_reach(self, angle):
+        """
+        Method for finding how many columns either side of its own cell hold the neighbours of each point
+
+        The widest longitude difference inside a circle grows with the latitude of its
+        centre, so it is taken from the latitude of every point: a point near a pole
+        does not widen the search of the points elsewhere.
+
+        Args:
+            angle (float): Radius as an angle in radians
+
+        Returns:
+            reach (numpy.ndarray): (N,) columns either side in cell sorted positions,
+                n_columns when the circle covers every longitude
+        """
+
+        cosine = np.cos(self._radians[:, 0])
+        reach = np.full(len(self), self._n_columns, dtype = np.int64)
+        if angle >= math.pi / 2:
+            return reach
+
+        # A circle that reaches a pole covers every longitude
+        partial = math.sin(angle) < cosine
+        delta = np.degrees(np.arcsin(math.sin(angle) / cosine[partial])) * (1 + 1e-9) + 1e-9
+        reach[partial] = np.ceil(delta / self._cell_degrees).astype(np.int64)
+        reach[2 * reach + 1 >= self._n_columns] = self._n_columns
+
+        return reach
+
+    def _radius_graph(self, radius, block_size = 2 ** 20):
+        """
+        Method for finding the neighbours of every indexed point in cell sorted positions
+
+        The cells of a target row that can hold the neighbours of a point are one
+        contiguous slice of the cell sorted points, two when the columns wrap around
+        the antimeridian. For every row offset the slices of all points are looked up
+        at once with searchsorted, so the work is vectorized over the points instead
+        of looping over them.
+
+        Args:
+            radius (float): Radius in km
+            block_size (int): Largest number of candidate pairs measured at once
+
+        Returns:
+            indptr (numpy.ndarray): (N + 1,) offsets, neighbours of position p are indices[indptr[p]:indptr[p + 1]]
+            indices (numpy.ndarray): Neighbour positions
+        """
+
+        angle = radius / EARTH_RADIUS
+        degrees = math.degrees(angle) * (1 + 1e-9) + 1e-9
+        row_reach = math.ceil(degrees / self._cell_degrees)
+
+        rows, columns = np.divmod(self._cells, self._n_columns)
+        reach = self._column_reach(angle)
+        full = reach >= self._n_columns
+        first = np.where(full, 0, columns - reach)
+        last = np.where(full, self._n_columns - 1, columns + reach)
+
+        # (first column, last column, used) of the slices, the last two are the wrapped columns
+        pieces = [(np.maximum(first, 0), np.minimum(last, self._n_columns - 1), None),
+                  (first + self._n_columns, self._n_columns - 1, first < 0),
+                  (0, last - self._n_columns, last >= self._n_columns)]
+
+        positions = np.arange(len(self))
+        sources, targets = [], []
+        for row_offset in range(-row_reach, row_reach + 1):
+            target_rows = rows + row_offset
+            inside = (target_rows >= 0) & (target_rows < self._n_rows)
+            for first_column, last_column, used in pieces:
+                if used is not None and not used.any():
+                    continue
+                starts = np.searchsorted(self._cells, target_rows * self._n_columns + first_column, side = "left")
+                stops = np.searchsorted(self._cells, target_rows * self._n_columns + last_column, side = "right")
+                lengths = np.where(inside if used is None else inside & used, stops - starts, 0)
+
+                # Split the points so that one block measures about block_size candidate pairs
+                ends = np.cumsum(lengths)
+                splits = np.searchsorted(ends, np.arange(block_size, ends[-1] if len(ends) else 0, block_size))
+                for block in np.split(positions, splits):
+                    if len(block) == 0:
+                        continue
+                    count = lengths[block]
+                    source = np.repeat(block, count)
+                    target = np.repeat(starts[block] - (np.cumsum(count) - count), count) + np.arange(count.sum())
+                    distance = haversine(self._radians[source, 0], self._radians[source, 1],
+                                         self._radians[target, 0], self._radians[target, 1])
+                    within = distance <= radius
+                    sources.append(source[within])
+                    targets.append(target[within])
+
+        sources = np.concatenate(sources) if sources else np.empty(0, dtype = np.int64)
+        targets = np.concatenate(targets) if targets else np.empty(0, dtype = np.int64)
+        order = np.argsort(sources, kind = "stable")
+
+        indptr = np.r_[0, np.cumsum(np.bincount(sources, minlength = len(self)))]
+        return indptr, targets[order]
+
+    def radius_graph(self, radius):
+        """
+        Method for finding every pair of indexed points within radius km of each other
+
+        Args:
+            radius (float): Radius in km
+
+        Returns:
+            indptr (numpy.ndarray): (N + 1,) offsets, the neighbours of point i are indices[indptr[i]:indptr[i + 1]]
+            indices (numpy.ndarray): Neighbour indices into coordinates, each point is its own neighbour
+        """
+
+        indptr, indices = self._radius_graph(radius)
+
+        # Reorder the rows from cell sorted positions to the original order
+        position = np.empty(len(self), dtype = np.int64)
+        position[self._order] = np.arange(len(self))
+        counts = np.diff(indptr)[position]
+        original_indptr = np.r_[0, np.cumsum(counts)]
+        gather = np.repeat(indptr[position] - original_indptr[:-1], counts) + np.arange(original_indptr[-1])
+
+        return original_indptr, self._order[indices[gather]]
+
+    def _queries(self, coordinates):
+        coordinates = as_coordinates(coordinates).reshape(-1, 2)
+        if not valid_geodesic(coordinates).all():
+            raise ValueError("query coordinates must be within latitude [-90, 90] and longitude [-180, 180]")
+        return coordinates
+
+    def query_radius(self, coordinates, radius, return_distance = False, sort_results = False):
+        """
+        Method for finding every indexed point within radius km of each query point
+
+        Args:
+            coordinates (array-like): (Q, 2) array of (latitude, longitude) or a single point
+            radius (float or array-like): Radius in km, one for all queries or one per query
+            return_distance (bool): Also return the distances
+            sort_results (bool): Sort each result by distance
+
+        Returns:
+            indices (numpy.ndarray): (Q,) object array of index arrays into coordinates
+            distance (numpy.ndarray): (Q,) object array of distance arrays, if return_distance
+        """
+
+        coordinates = self._queries(coordinates)
+        radius = np.broadcast_to(np.asarray(radius, dtype = np.float64), (len(coordinates),))
+
+        indices = np.empty(len(coordinates), dtype = object)
+        distances = np.empty(len(coordinates), dtype = object)
+        for i, (latitude, longitude) in enumerate(coordinates):
+            positions, distance = self._within(latitude, longitude, radius[i])
+            if sort_results:
+                order = np.argsort(distance, kind = "stable")
+                positions, distance = positions[order], distance[order]
+            indices[i] = self._order[positions]
+            distances[i] = distance
+
+        if return_distance:
+            return indices, distances
+        return indices
+
+    def query(self, coordinates, k = 1):
+        """
+        Method for finding the k nearest indexed points of each query point
+
+        The search radius starts at one cell and doubles until k points are inside it;
+        every point outside the radius is further than the k points found.
+
+        Args:
+            coordinates (array-like): (Q, 2) array of (latitude, longitude) or a single point
+            k (int): Number of neighbours
+
+        Returns:
+            distance (numpy.ndarray): (Q, k) distances in km, nearest first
+            indices (numpy.ndarray): (Q, k) indices into coordinates
+        """
+
+        if not 1 <= k <= len(self):
+            raise ValueError("k must be between 1 and {}, got {}".format(len(self), k))
+
+        coordinates = self._queries(coordinates)
+        distances = np.empty((len(coordinates), k), dtype = np.float64)
+        indices = np.empty((len(coordinates), k), dtype = np.int64)
+
+        for i, (latitude, longitude) in enumerate(coordinates):
+            radius = self.cell_size
+            while True:
+                positions, distance = self._within(latitude, longitude, radius)
+                if len(positions) >= k:
+                    break
+                radius = min(radius * 2, math.pi * EARTH_RADIUS)
+
+            nearest = np.argpartition(distance, k - 1)[:k] if len(distance) > k else np.arange(len(distance))
+            nearest = nearest[np.argsort(distance[nearest], kind = "stable")]
+            distances[i] = distance[nearest]
+            indices[i] = self._order[positions[nearest]]
+
+        return distances, indices
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming distance calculation over CSV or Parquet files larger than memory
+
+pandas is needed for CSV files and pyarrow for Parquet files, both are imported
+only when a file is streamed.
+
+@author: Reza
+"""
+
+import time
+
+from .BatchDistance import batch_distance
+
+def is_parquet(filepath):
+    return str(filepath).lower().endswith((".parquet", ".pq"))
+
+def read_chunks(filepath, columns, chunksize):
+    """
+    Method for reading a CSV or Parquet file a chunk of rows at a time
+
+    The columns are read as float64, so that every chunk has the same schema when
+    one chunk holds only integers or a blank cell.
+
+    Args:
+        filepath (str): .csv or .parquet file path
+        columns (list): Columns to read
+        chunksize (int): Rows per chunk
+
+    Yields:
+        chunk (pandas dataframe): Next chunk with the requested columns as float64
+    """
+
+    columns = list(columns)
+
+    if is_parquet(filepath):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size = chunksize, columns = columns):
+            yield batch.to_pandas()[columns].astype("float64")
+    else:
+        import pandas as pd
+
+        dtype = {column: "float64" for column in columns}
+        for chunk in pd.read_csv(filepath, usecols = columns, dtype = dtype, chunksize = chunksize, engine = "c"):
+            yield chunk[columns]
+
+class ChunkWriter:
+    """
+    The ChunkWriter appends chunks to a CSV or Parquet file
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._parquet_writer = None
+        self._first = True
+
+    def write(self, chunk):
+        if is_parquet(self.filepath):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index = False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.filepath, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.filepath, mode = "w" if self._first else "a", header = self._first, index = False)
+        self._first = False
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def stream_distance(input_filepath, output_filepath, columns, metric = "geodesic", chunksize = 1000000,
+                    output_column = "distance", report = None, **kwargs):
+    """
+    Method for finding the distance of every row of a file, one chunk at a time
+
+    Only one chunk is held in memory, so memory stays flat regardless of file size.
+
+    Args:
+        input_filepath (str): .csv or .parquet file with the coordinate columns
+        output_filepath (str): .csv or .parquet file the coordinates and distance are written to
+        columns (list): Four column names (lat_1, lon_1, lat_2, lon_2) or (x_1, y_1, x_2, y_2)
+        metric (str): "geodesic" or "euclidean"
+        chunksize (int): Rows per chunk
+        output_column (str): Name of the distance column
+        report (callable): Called after every chunk with (rows, seconds) so far
+        kwargs: Passed to batch_distance, e.g. method or n_jobs
+
+    Returns:
+        summary (dict): rows, seconds and rows_per_second
+    """
+
+    columns = list(columns)
+    if len(columns) != 4:
+        raise ValueError("columns must name four columns, got {}".format(columns))
+
+    start = time.perf_counter()
+    rows = 0
+    writer = ChunkWriter(output_filepath)
+    try:
+        for chunk in read_chunks(input_filepath, columns, chunksize):
+            chunk[output_column] = batch_distance(chunk[columns[:2]].to_numpy(dtype = "float64"),
+                                                  chunk[columns[2:]].to_numpy(dtype = "float64"),
+                                                  metric = metric, **kwargs)
+            writer.write(chunk)
+            rows += len(chunk)
+            if report is not None:
+                report(rows, time.perf_counter() - start)
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {"rows": rows,
+            "seconds": seconds,
+            "rows_per_second": rows / seconds if seconds else float("nan")}
@@ -1,2 +1,12 @@
 from .PointDistance import GeodesicPoints
-from .PointDistance import EuclideanPoints
\ No newline at end of file
+from .PointDistance import EuclideanPoints
+from .BatchDistance import batch_distance
+from .BatchDistance import geodesic_distances
+from .BatchDistance import euclidean_distances
+from .CrossDistance import cross_distance
+from .SpatialIndex import GeodesicIndex
+from .PointSet import GeodesicPointSet
+from .PointSet import EuclideanPointSet
+from .DistanceCache import DistanceCache
+from .StreamDistance import stream_distance
+from .Clustering import GeodesicDBSCAN
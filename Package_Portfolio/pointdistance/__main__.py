@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Command line entry point for streaming distances over a CSV or Parquet file
+
+Example:
+    python -m pointdistance pings.parquet distances.parquet --columns lat_1 lon_1 lat_2 lon_2
+"""
+
+import sys
+import argparse
+
+from .BatchDistance import GEODESIC_METHODS, METRICS
+from .StreamDistance import stream_distance
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog = "python -m pointdistance",
+                                     description = "Find the distance of every row of a CSV or Parquet "
+                                                   "file, streaming it a chunk at a time")
+    parser.add_argument("input_filepath", help = ".csv or .parquet file with the coordinate columns")
+    parser.add_argument("output_filepath", help = ".csv or .parquet file to write the distances to")
+    parser.add_argument("--columns", nargs = 4, required = True, metavar = "COLUMN",
+                        help = "lat_1 lon_1 lat_2 lon_2 (or x_1 y_1 x_2 y_2 for euclidean)")
+    parser.add_argument("--metric", choices = sorted(METRICS), default = "geodesic")
+    parser.add_argument("--method", choices = sorted(GEODESIC_METHODS), default = "haversine",
+                        help = "geodesic formula")
+    parser.add_argument("--chunksize", type = int, default = 1000000, help = "rows per chunk")
+    parser.add_argument("--output-column", default = "distance")
+    parser.add_argument("--n-jobs", type = int, default = 1, help = "processes per chunk, -1 for every CPU")
+    return parser.parse_args(args)
+
+def main(args = None):
+    args = parse_args(sys.argv[1:] if args is None else args)
+
+    kwargs = {"n_jobs": args.n_jobs}
+    if args.metric == "geodesic":
+        kwargs["method"] = args.method
+
+    def report(rows, seconds):
+        print("    {:,} rows, {:,.0f} rows/s".format(rows, rows / seconds if seconds else 0), flush = True)
+
+    print("Streaming distances...\n    INPUT: {}\n    OUTPUT: {}".format(args.input_filepath, args.output_filepath))
+    summary = stream_distance(args.input_filepath, args.output_filepath, args.columns, metric = args.metric,
+                              chunksize = args.chunksize, output_column = args.output_column,
+                              report = report, **kwargs)
+    print("Done: {rows:,} rows in {seconds:.2f}s ({rows_per_second:,.0f} rows/s)".format(**summary))
+
+if __name__ == '__main__':
+    main()
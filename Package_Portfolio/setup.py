@@ -5,4 +5,6 @@ setup(name = "pointdistance",
         description = "Find distance between points",
         packages = ["pointdistance"],
         author = "Abdullah Reza",
+        install_requires = ["numpy"],
+        extras_require = {"stream": ["pandas", "pyarrow"]},
         zip_safe = False)
\ No newline at end of file
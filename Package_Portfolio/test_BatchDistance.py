@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the vectorized batch distance
+"""
+
+import numpy as np
+import pandas as pd
+from pointdistance import GeodesicPoints
+from pointdistance import EuclideanPoints
+from pointdistance import batch_distance
+from pointdistance import geodesic_distances
+
+def test_batch_matches_points():
+    coordinates_1 = np.array([[3.139, 101.6869], [51.5074, -0.1278], [0, 3]])
+    coordinates_2 = np.array([[1.3521, 103.8198], [40.7128, -74.0060], [4, 0]])
+    geodesic = batch_distance(coordinates_1, coordinates_2, metric = "geodesic", decimals = 4)
+    euclidean = batch_distance(coordinates_1, coordinates_2, metric = "euclidean", decimals = 4)
+    for i in range(len(coordinates_1)):
+        c_1, c_2 = tuple(coordinates_1[i]), tuple(coordinates_2[i])
+        assert(geodesic[i] == GeodesicPoints(c_1, c_2).distance)
+        assert(euclidean[i] == EuclideanPoints(c_1, c_2).distance)
+
+def test_batch_invalid_rows_are_nan():
+    distance = batch_distance([[0, 0], [91, 0], [0, 181]], [[1, 1], [0, 0], [0, 0]])
+    assert(not np.isnan(distance[0]))
+    assert(np.isnan(distance[1:]).all())
+
+def test_batch_accepts_dataframe_and_single_point():
+    df = pd.DataFrame({"lat": [0.0, 0.0], "lon": [0.0, 1.0]})
+    distance = batch_distance(df[["lat", "lon"]], (0, 0))
+    assert(distance.shape == (2,))
+    assert(distance[0] == 0)
+
+def test_geodesic_methods():
+    # Flinders Peak to Buninyong, Vincenty (1975)
+    distance = geodesic_distances([[-37.95103341666667, 144.42486788888888]], [[-37.65282113888889, 143.92649552777777]],
+                                  method = "vincenty")
+    assert(np.allclose(distance, 54.972271, atol = 1e-6))
+    short = [[3.139, 101.6869], [3.1579, 101.7123]]
+    haversine = geodesic_distances(short[0], short[1])
+    equirectangular = geodesic_distances(short[0], short[1], method = "equirectangular")
+    assert(abs(haversine - equirectangular) < 1e-6)
+    # Across the antimeridian, in both directions
+    across = geodesic_distances([[0, 179.9], [0, -179.9]], [[0, -179.9], [0, 179.9]], method = "equirectangular")
+    assert(np.allclose(across, geodesic_distances([[0, 179.9]], [[0, -179.9]]), rtol = 1e-9))
+    assert(GeodesicPoints((0, 0), (0, 1), method = "vincenty").distance == 111.3195)
+
+def test_batch_parallel_matches_serial():
+    rng = np.random.default_rng(0)
+    coordinates_1 = np.column_stack([rng.uniform(-90, 90, 1000), rng.uniform(-180, 180, 1000)])
+    coordinates_2 = np.column_stack([rng.uniform(-90, 90, 1000), rng.uniform(-180, 180, 1000)])
+    serial = batch_distance(coordinates_1, coordinates_2, method = "vincenty")
+    parallel = batch_distance(coordinates_1, coordinates_2, method = "vincenty", n_jobs = 2, min_parallel_size = 0)
+    assert(np.array_equal(serial, parallel))
+    assert(np.array_equal(batch_distance(coordinates_1, (0, 0), n_jobs = 2, min_parallel_size = 0),
+                          batch_distance(coordinates_1, (0, 0))))
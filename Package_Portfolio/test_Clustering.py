@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the geodesic DBSCAN clustering
+"""
+
+import numpy as np
+from pointdistance import cross_distance
+from pointdistance import GeodesicDBSCAN
+
+def test_two_blobs_and_noise():
+    rng = np.random.default_rng(0)
+    kl = rng.normal([3.14, 101.69], 0.005, (50, 2))
+    singapore = rng.normal([1.35, 103.82], 0.005, (30, 2))
+    noise = np.array([[10, 10], [-30, 150]])
+    dbscan = GeodesicDBSCAN(eps = 1, min_samples = 5).fit(np.vstack([kl, singapore, noise]))
+    assert(dbscan.n_clusters == 2)
+    assert(len(set(dbscan.labels[:50])) == 1 and len(set(dbscan.labels[50:80])) == 1)
+    assert(list(dbscan.labels[80:]) == [-1, -1])
+    assert(sorted(dbscan.sizes) == [30, 50])
+    assert(np.allclose(dbscan.centroids[dbscan.labels[0]], kl.mean(axis = 0), atol = 1e-4))
+
+def test_core_points_match_brute_force():
+    rng = np.random.default_rng(1)
+    points = rng.normal([3.14, 101.69], 0.05, (400, 2))
+    dbscan = GeodesicDBSCAN(eps = 0.8, min_samples = 6).fit(points)
+    neighbours = cross_distance(points, points) <= 0.8
+    assert(np.array_equal(dbscan.core, neighbours.sum(axis = 1) >= 6))
+    # Core points within eps of each other always share a cluster
+    core = np.flatnonzero(dbscan.core)
+    linked = neighbours[np.ix_(core, core)]
+    assert(np.array_equal((dbscan.labels[core][:, None] == dbscan.labels[core][None, :]) | ~linked,
+                          np.ones_like(linked)))
+    assert(np.array_equal(dbscan.labels == -1, ~(neighbours[:, dbscan.core].any(axis = 1))))
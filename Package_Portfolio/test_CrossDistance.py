@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the chunked cross distance matrix
+"""
+
+import numpy as np
+from pointdistance import batch_distance
+from pointdistance import cross_distance
+
+def test_cross_matches_batch_for_every_chunk_size():
+    rng = np.random.default_rng(0)
+    coordinates_1 = np.column_stack([rng.uniform(-90, 90, 7), rng.uniform(-180, 180, 7)])
+    coordinates_2 = np.column_stack([rng.uniform(-90, 90, 5), rng.uniform(-180, 180, 5)])
+    expected = np.array([batch_distance(coordinates_1, c_2) for c_2 in coordinates_2]).T
+    for memory_budget in [1, 5 * 8 * 8 * 3, 2 ** 20]:
+        distance = cross_distance(coordinates_1, coordinates_2, memory_budget = memory_budget)
+        assert(distance.shape == (7, 5))
+        assert(np.allclose(distance, expected))
+
+def test_cross_writes_into_memmap(tmp_path):
+    path = str(tmp_path / "distance.npy")
+    distance = cross_distance([[0, 0], [3, 4]], [[0, 0]], metric = "euclidean", out = path)
+    assert(np.array_equal(np.load(path), [[0], [5]]))
+    assert(np.array_equal(distance, [[0], [5]]))
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the distance memoization cache
+"""
+
+from pointdistance import GeodesicPoints
+from pointdistance import DistanceCache
+
+def test_cache_is_symmetric_and_counts():
+    cache = DistanceCache()
+    assert(cache((0, 0), (0, 1)) == GeodesicPoints((0, 0), (0, 1)).distance)
+    assert(cache((0, 1), (0, 0)) == GeodesicPoints((0, 0), (0, 1)).distance)
+    assert(cache.cache_info() == (1, 1, 65536, 1))
+    assert(cache.hit_rate == 0.5)
+
+def test_cache_evicts_least_recently_used():
+    cache = DistanceCache(metric = "euclidean", maxsize = 2)
+    cache((0, 0), (3, 4))
+    cache((0, 0), (6, 8))
+    cache((0, 0), (3, 4))
+    cache((0, 0), (1, 1))
+    assert(len(cache) == 2)
+    cache((0, 0), (3, 4))
+    assert(cache.hits == 2)
+    cache((0, 0), (6, 8))
+    assert(cache.misses == 4)
+
+def test_cache_rounds_keys_and_skips_nan():
+    cache = DistanceCache(decimals = 3, method = "vincenty")
+    assert(cache.key((0.0001, 1), (0, 1.0004)) == ((0, 1000), (0, 1000)))
+    assert(cache((3.1390001, 101.6869), (3.1579, 101.7123)) == GeodesicPoints((3.139, 101.687), (3.158, 101.712),
+                                                                              method = "vincenty").distance)
+    assert(cache((3.139, 101.6869), (3.1579, 101.7123)) == cache((3.1579, 101.7123), (3.139, 101.6869)))
+    assert(cache.cache_info() == (2, 1, 65536, 1))
+    assert(cache((float("nan"), 0), (0, 0)) is None)
+    assert(len(cache) == 1)
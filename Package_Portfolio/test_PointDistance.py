@@ -5,10 +5,35 @@ Created on Tue Jul 28 09:37:48 2020
 @author: Reza
 """
 
+import numpy as np
 from pointdistance import GeodesicPoints
 from pointdistance import EuclideanPoints
+from pointdistance import geodesic_distances
 from math import nan
 
 def test_EuclideanPoints():
     euclideanPoints = EuclideanPoints((0, 3), (4, 0))
-    assert(euclideanPoints.distance == 5)
\ No newline at end of file
+    assert(euclideanPoints.distance == 5)
+
+def test_GeodesicPoints():
+    geodesicPoints = GeodesicPoints((0, 0), (0, 1))
+    assert(geodesicPoints.distance == 111.1949)
+    assert(GeodesicPoints((91, 0), (0, 0)).distance is None)
+
+def test_Points_have_no_dict():
+    assert(not hasattr(GeodesicPoints((0, 0), (0, 1)), "__dict__"))
+    assert(not hasattr(EuclideanPoints((0, 3), (4, 0)), "__dict__"))
+
+def test_GeodesicPoints_methods_match_batch():
+    rng = np.random.default_rng(0)
+    coordinates_1 = np.vstack([np.column_stack([rng.uniform(-90, 90, 200), rng.uniform(-180, 180, 200)]),
+                               [[0, 179.9], [0, 0], [90, 0], [0, 0], [3.139, 101.6869]]])
+    coordinates_2 = np.vstack([np.column_stack([rng.uniform(-90, 90, 200), rng.uniform(-180, 180, 200)]),
+                               [[0, -179.9], [0.5, 179.7], [-90, 0], [0, 0], [3.1579, 101.7123]]])
+    for method in ["haversine", "equirectangular", "vincenty"]:
+        batch = geodesic_distances(coordinates_1, coordinates_2, method = method)
+        points = [GeodesicPoints(tuple(c_1), tuple(c_2), method = method).distance
+                  for c_1, c_2 in zip(coordinates_1, coordinates_2)]
+        # Rounded to 4 decimals like the points
+        assert(np.allclose(points, batch, rtol = 0, atol = 1e-4))
+    assert(GeodesicPoints((0, 0), (0, 1), method = "equirectangular").distance == 111.1949)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the columnar point sets
+"""
+
+import numpy as np
+from pointdistance import GeodesicPoints
+from pointdistance import GeodesicPointSet
+from pointdistance import EuclideanPointSet
+
+def test_EuclideanPointSet():
+    pointSet = EuclideanPointSet([[0, 3], [1, 1]], [[4, 0], [1, 1]])
+    assert(np.array_equal(pointSet.distance, [5, 0]))
+    assert(pointSet.coordinates_1.flags.c_contiguous)
+    assert(pointSet.nbytes == 2 * 2 * 2 * 8)
+
+def test_GeodesicPointSet_matches_points():
+    points = [GeodesicPoints((0, 0), (0, 1)), GeodesicPoints((3.139, 101.6869), (1.3521, 103.8198))]
+    pointSet = GeodesicPointSet.from_points(points)
+    assert(np.array_equal(np.round(pointSet.distance, 4), [p.distance for p in points]))
+    assert(isinstance(pointSet[1], GeodesicPoints))
+    assert(pointSet[1].distance == points[1].distance)
+    assert(len(pointSet[:1]) == 1)
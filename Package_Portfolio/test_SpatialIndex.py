@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the geodesic grid index against brute force
+"""
+
+import numpy as np
+from pointdistance import cross_distance
+from pointdistance import GeodesicIndex
+
+def random_coordinates(n_points, seed):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(-90, 90, n_points), rng.uniform(-180, 180, n_points)])
+
+def test_query_radius_matches_brute_force():
+    points = random_coordinates(2000, 0)
+    queries = np.vstack([random_coordinates(20, 1), [[89.9, 0], [-89.9, 10], [0, 179.99], [10, -179.99]]])
+    index = GeodesicIndex(points, cell_size = 100)
+    distance = cross_distance(queries, points)
+    for radius in [50, 500, 3000]:
+        found = index.query_radius(queries, radius)
+        for i in range(len(queries)):
+            assert(set(found[i]) == set(np.flatnonzero(distance[i] <= radius)))
+
+def test_query_matches_brute_force():
+    points = random_coordinates(2000, 2)
+    queries = np.vstack([random_coordinates(20, 3), [[90, 0], [0, 180]]])
+    index = GeodesicIndex(points, cell_size = 50)
+    distance, indices = index.query(queries, k = 5)
+    expected = np.sort(cross_distance(queries, points), axis = 1)[:, :5]
+    assert(np.allclose(distance, expected))
+    assert(np.allclose(cross_distance(queries, points)[np.arange(len(queries))[:, None], indices], expected))
+
+def test_radius_graph_matches_brute_force():
+    points = np.vstack([random_coordinates(500, 4), [[89.99, 0], [89.99, 180], [0, 180], [0, -180]]])
+    indptr, indices = GeodesicIndex(points, cell_size = 200).radius_graph(300)
+    neighbours = cross_distance(points, points) <= 300
+    for i in range(len(points)):
+        assert(sorted(indices[indptr[i]:indptr[i + 1]]) == list(np.flatnonzero(neighbours[i])))
+
+def test_radius_graph_polar_outlier(monkeypatch):
+    from pointdistance import SpatialIndex
+    measured = []
+    original = SpatialIndex.haversine
+
+    def haversine(lat_1, lon_1, lat_2, lon_2):
+        measured.append(np.size(lat_1))
+        return original(lat_1, lon_1, lat_2, lon_2)
+
+    rng = np.random.default_rng(5)
+    points = np.column_stack([rng.normal(3.139, 0.05, 5000), rng.normal(101.6869, 0.05, 5000)])
+    monkeypatch.setattr(SpatialIndex, "haversine", haversine)
+
+    indptr, indices = GeodesicIndex(points, cell_size = 0.3).radius_graph(0.3)
+    candidates = sum(measured)
+    for outlier in [[85, 0], [89.9, 0], [-90, 0]]:
+        measured.clear()
+        outlier_indptr, outlier_indices = GeodesicIndex(np.vstack([points, [outlier]]), cell_size = 0.3).radius_graph(0.3)
+        # The outlier is only measured against itself
+        assert(sum(measured) == candidates + 1)
+        assert(np.array_equal(outlier_indptr[:-1], indptr))
+        assert(list(outlier_indices[indptr[-1]:]) == [len(points)])
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for streaming distances over files
+"""
+
+import numpy as np
+import pandas as pd
+from pointdistance import batch_distance
+from pointdistance import stream_distance
+from pointdistance.__main__ import main
+
+def test_stream_csv_in_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.uniform(-80, 80, (1001, 4)), columns = ["lat_1", "lon_1", "lat_2", "lon_2"])
+    df.to_csv(tmp_path / "pairs.csv", index = False)
+    reports = []
+    summary = stream_distance(str(tmp_path / "pairs.csv"), str(tmp_path / "out.csv"),
+                              ["lat_1", "lon_1", "lat_2", "lon_2"], chunksize = 100,
+                              report = lambda rows, seconds: reports.append(rows))
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert(summary["rows"] == 1001)
+    assert(reports[-1] == 1001 and len(reports) == 11)
+    assert(np.allclose(out["distance"], batch_distance(df[["lat_1", "lon_1"]], df[["lat_2", "lon_2"]])))
+
+def test_cli(tmp_path):
+    pd.DataFrame({"x_1": [0], "y_1": [3], "x_2": [4], "y_2": [0]}).to_csv(tmp_path / "pairs.csv", index = False)
+    main([str(tmp_path / "pairs.csv"), str(tmp_path / "out.csv"), "--metric", "euclidean",
+          "--columns", "x_1", "y_1", "x_2", "y_2"])
+    assert(pd.read_csv(tmp_path / "out.csv")["distance"].tolist() == [5])
+
+def test_stream_csv_to_parquet_mixed_chunks(tmp_path):
+    # The first chunk holds only integers, a later one floats and a blank cell
+    with open(tmp_path / "mixed.csv", "w") as f:
+        f.write("x_1,y_1,x_2,y_2\n0,3,4,0\n1,1,1,1\n0.5,0,0.5,2.5\n0,,3,4\n")
+    for output in ["out.parquet", "out.csv"]:
+        summary = stream_distance(str(tmp_path / "mixed.csv"), str(tmp_path / output),
+                                  ["x_1", "y_1", "x_2", "y_2"], metric = "euclidean", chunksize = 2)
+        out = pd.read_parquet(tmp_path / output) if output.endswith(".parquet") else pd.read_csv(tmp_path / output)
+        assert(summary["rows"] == 4)
+        assert(out["distance"].tolist()[:3] == [5, 0, 2.5])
+        assert(np.isnan(out["distance"].iloc[3]))
@@ -0,0 +1,147 @@
+"""
+ASGI version of the app on Quart, run in the app's directory with an ASGI server:
+
+    hypercorn asgi_app:app --bind 0.0.0.0:3001
+    uvicorn asgi_app:app --host 0.0.0.0 --port 3001
+
+The pages and the model are those of run.py. The event loop only parses requests
+and renders templates, the classification runs on a bounded thread pool, where
+the prediction cache and the micro-batcher of run.py are shared by the threads.
+The model itself only runs on the single worker of run.batcher, more threads do
+not predict in parallel, they let more requests wait in one micro-batch.
+When more classifications are waiting than the queue limit the request is
+answered 503 at once instead of queueing behind a slow forest.
+"""
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, render_template, request, jsonify
+
+import run
+
+app = Quart(__name__)
+
+# requests submitted to run.batcher at the same time, the most requests one micro-batch
+# combines. The model runs on the one batcher worker whatever the number of threads,
+# the others wait for it, or answer cache hits while it runs
+INFERENCE_THREADS = int(os.environ.get('DISASTER_RESPONSE_INFERENCE_THREADS', 4))
+# classifications running or waiting for a thread before requests are turned away
+MAX_PENDING = int(os.environ.get('DISASTER_RESPONSE_MAX_PENDING', 64))
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+pending = 0
+
+
+class Overloaded(Exception):
+    pass
+
+
+async def offload(function, *args):
+    """
+    Run a blocking function on the inference pool, Overloaded if the queue is full
+
+    pending is only changed on the event loop thread so it needs no lock.
+    """
+    global pending
+    if pending >= MAX_PENDING:
+        raise Overloaded()
+    pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+    finally:
+        pending -= 1
+
+
+def classify_query(query):
+    run.refresh_data()
+    labels, _ = run.predict([query])
+    return dict(zip(run.category_names, labels[0]))
+
+
+def overloaded(json=False):
+    body = {'error': 'overloaded, {} classifications pending'.format(pending)}
+    response = jsonify(body) if json else body['error']
+    return response, 503, {'Retry-After': '1'}
+
+
+@app.before_serving
+async def warm_up():
+    # DISASTER_RESPONSE_LAZY=1 loads on the first request instead
+    if os.environ.get('DISASTER_RESPONSE_LAZY') != '1':
+        await asyncio.get_running_loop().run_in_executor(None, run.warm_up)
+
+
+@app.after_serving
+async def shutdown():
+    executor.shutdown(wait=False)
+
+
+# index webpage displays cool visuals and receives user input text for model
+@app.route('/')
+@app.route('/index')
+async def index():
+
+    # the graphs are built once per version of the data, off the loop when it changed
+    await asyncio.get_running_loop().run_in_executor(None, run.refresh_data)
+    ids, graphJSON = run.graphs
+
+    # render web page with plotly graphs
+    return await render_template('master.html', ids=ids, graphJSON=graphJSON)
+
+
+# web page that handles user query and displays model results
+@app.route('/go')
+async def go():
+    # save user input in query
+    query = request.args.get('query', '')
+
+    # use model to predict classification for query on the inference pool
+    try:
+        classification_results = await offload(classify_query, query)
+    except Overloaded:
+        return overloaded()
+
+    # This will render the go.html Please see that file.
+    return await render_template(
+        'go.html',
+        query=query,
+        classification_result=classification_results
+    )
+
+
+# JSON API that classifies a list of messages
+@app.route('/api/classify', methods=['POST'])
+async def api_classify():
+    messages, error, status = run.parse_messages(await request.get_json(silent=True))
+    if error is not None:
+        return jsonify(error=error), status
+
+    try:
+        return jsonify(await offload(run.classification_results, messages))
+    except Overloaded:
+        return overloaded(json=True)
+
+
+@app.route('/cache/stats')
+async def cache_stats():
+    return jsonify(dict(run.prediction_cache.stats(), pending=pending, max_pending=MAX_PENDING))
+
+
+@app.route('/healthz')
+async def healthz():
+    return jsonify(status='ok')
+
+
+@app.route('/readyz')
+async def readyz():
+    status = run.readiness()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+def main():
+    app.run(host='0.0.0.0', port=3001)
+
+
+if __name__ == '__main__':
+    main()
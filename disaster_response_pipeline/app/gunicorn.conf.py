@@ -0,0 +1,16 @@
+# gunicorn settings of the app, see wsgi.py
+import os
+import multiprocessing
+
+bind = os.environ.get('DISASTER_RESPONSE_BIND', '0.0.0.0:3001')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# threads of a worker serve concurrent requests whose messages the micro-batcher classifies together
+worker_class = 'gthread'
+threads = int(os.environ.get('DISASTER_RESPONSE_THREADS', 8))
+
+# load the data and the model in the master before forking the workers
+preload_app = True
+
+timeout = 60
+graceful_timeout = 30
@@ -0,0 +1,87 @@
+"""
+Load test of the app, reports the latency percentiles and requests per second
+
+Example:
+    python load_test.py http://0.0.0.0:3001 --requests 2000 --concurrency 32
+    python load_test.py http://0.0.0.0:3001 --endpoint api --batch-size 50
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+WORDS = ('water food medical help flood earthquake storm fire shelter children people need '
+         'please urgent road blocked hospital sick hungry rain wind damage rescue family').split()
+
+def make_messages(n_messages, unique, seed=0):
+    """
+    Random messages, a 'unique' fraction of them distinct and the rest repeated
+    """
+    rng = random.Random(seed)
+    distinct = [' '.join(rng.choices(WORDS, k=rng.randint(5, 25))) for _ in range(max(1, int(n_messages * unique)))]
+    return [distinct[i] if i < len(distinct) else rng.choice(distinct) for i in range(n_messages)]
+
+def send(url, endpoint, messages, timeout):
+    """
+    Send one request, returns the latency in seconds and the status code
+    """
+    if endpoint == 'go':
+        request = urllib.request.Request('{}/go?{}'.format(url, urllib.parse.urlencode({'query': messages[0]})))
+    else:
+        request = urllib.request.Request('{}/api/classify'.format(url), data=json.dumps(messages).encode(),
+                                         headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return time.perf_counter() - start, status
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the disaster response app')
+    parser.add_argument('url', nargs='?', default='http://127.0.0.1:3001')
+    parser.add_argument('--endpoint', choices=('go', 'api'), default='go')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=1, help='messages per /api/classify request')
+    parser.add_argument('--unique', type=float, default=1.0, help='fraction of distinct messages')
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    batch_size = args.batch_size if args.endpoint == 'api' else 1
+    messages = make_messages(args.requests * batch_size, args.unique)
+    batches = [messages[i:i + batch_size] for i in range(0, len(messages), batch_size)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        results = list(executor.map(lambda batch: send(args.url.rstrip('/'), args.endpoint, batch, args.timeout),
+                                    batches))
+    elapsed = time.perf_counter() - start
+
+    latency = np.array([seconds for seconds, _ in results]) * 1000
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print('{} requests to /{} in {:.2f}s, concurrency {}'.format(len(results), args.endpoint, elapsed, args.concurrency))
+    print('    requests/s: {:.1f}, messages/s: {:.1f}'.format(len(results) / elapsed, len(messages) / elapsed))
+    print('    latency ms: p50 {:.1f}, p90 {:.1f}, p99 {:.1f}, max {:.1f}'.format(
+        *np.percentile(latency, [50, 90, 99]), latency.max()))
+    print('    status codes: {}'.format(dict(sorted(statuses.items()))))
+
+    return 0 if set(statuses) == {200} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,56 +1,58 @@
+import os
+import sys
 import nltk
 import json
+import time
+import queue
+import threading
 import plotly
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
-nltk.download(['punkt','wordnet'])
+from collections import OrderedDict
+from concurrent.futures import Future
+nltk.download(['punkt','wordnet','stopwords'])
 
 from flask import Flask
 from flask import render_template, request, jsonify
 from plotly.graph_objs import Bar, Histogram
-from sklearn.externals import joblib
+import joblib
 from sqlalchemy import create_engine
 
+# modules shared with the training scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+from columnar import COLUMNAR_EXTENSIONS, read_columnar
+from tokenizer import Tokenizer
 
-app = Flask(__name__)
-
-def tokenize(text):
-    tokens = word_tokenize(text)
-    lemmatizer = WordNetLemmatizer()
-
-    clean_tokens = []
-    for tok in tokens:
-        clean_tok = lemmatizer.lemmatize(tok).lower().strip()
-        clean_tokens.append(clean_tok)
 
-    return clean_tokens
-
-# load data
-engine = create_engine('sqlite:///../data/DisasterResponse.db')
-df = pd.read_sql_table('messages', engine)
+app = Flask(__name__)
 
-# load model
-model = joblib.load("../models/classifier.pkl")
+def load_data(filepath):
+    """
+    Load the messages from the sqlite database or from a columnar file,
+    the 'original' text is not used by the app and is skipped for columnar files
+    """
+    if filepath.endswith(COLUMNAR_EXTENSIONS):
+        return read_columnar(filepath, exclude=('original',))
 
+    engine = create_engine('sqlite:///{}'.format(filepath))
+    return pd.read_sql_table('messages', engine)
 
-# index webpage displays cool visuals and receives user input text for model
-@app.route('/')
-@app.route('/index')
-def index():
-    
+def build_graphs(df, category_names):
+    """
+    Aggregate the data and encode the plotly graphs of the index page
+    """
     # extract data needed for visuals
     # Viz 1
     genre = df.groupby('genre').count()['id'].sort_values()
     
     # Viz 2
-    df['text length'] = df['message'].apply(lambda x: len(x.split()))
-    histogram = df[df['text length'] < 100].groupby('text length').count()['id']
+    text_length = df['message'].str.split().str.len()
+    histogram = text_length[text_length < 100].value_counts().sort_index()
 
     # Viz 3
-    total_category = df.drop(columns=['id','message','original','genre', 'text length']).sum().sort_values(ascending=False).head(5)
+    total_category = df[category_names].sum().sort_values(ascending=False).head(5)
 
     # create visuals
     graphs = [
@@ -116,6 +118,332 @@ def index():
     # encode plotly graphs in JSON
     ids = ["graph-{}".format(i) for i, _ in enumerate(graphs)]
     graphJSON = json.dumps(graphs, cls=plotly.utils.PlotlyJSONEncoder)
+
+    return ids, graphJSON
+
+def data_version(filepath):
+    """
+    Modification time and size of the data file, and of the sqlite write-ahead log
+    that holds the changes of process_data.py --upsert until they are checkpointed
+    """
+    version = []
+    for path in (filepath, filepath + '-wal'):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+# load data
+# DISASTER_RESPONSE_DATA may point to the .db or to a .parquet/.feather file
+DATA_FILEPATH = os.environ.get('DISASTER_RESPONSE_DATA', '../data/DisasterResponse.db')
+data_lock = threading.Lock()
+loaded_version = None
+df = category_names = graphs = None
+
+def refresh_data():
+    """
+    Load the data and build the index graphs, again only when the data file changed
+    """
+    global df, category_names, graphs, loaded_version
+    version = data_version(DATA_FILEPATH)
+    if version == loaded_version:
+        return
+    with data_lock:
+        if version == loaded_version:
+            return
+        new_df = load_data(DATA_FILEPATH)
+        new_category_names = [column for column in new_df.columns
+                              if column not in ('id', 'message', 'original', 'genre')]
+        graphs = build_graphs(new_df, new_category_names)
+        df, category_names = new_df, new_category_names
+        loaded_version = version
+
+class PredictionCache:
+    """
+    LRU cache of the classification of a message with a time to live
+
+    Messages are keyed on their normalized text, the lowercase alphanumeric words
+    the tokenizer sees, so the same forwarded message with different case, spacing
+    or punctuation is classified once. clear() starts a new generation so that
+    predictions of a model in flight when the model is reloaded are not cached.
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.evictions = 0
+
+    @staticmethod
+    def key(text):
+        return ' '.join(Tokenizer.pattern.sub(' ', text.lower()).split())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation):
+        with self._lock:
+            if generation != self.generation or self.maxsize <= 0:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses, 'expired': self.expired,
+                    'evictions': self.evictions, 'generation': self.generation,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+# DISASTER_RESPONSE_CACHE_SIZE=0 turns the cache off
+prediction_cache = PredictionCache(maxsize=int(os.environ.get('DISASTER_RESPONSE_CACHE_SIZE', 10000)),
+                                   ttl=float(os.environ.get('DISASTER_RESPONSE_CACHE_TTL', 3600)))
+
+# load model
+# DISASTER_RESPONSE_MMAP=1 memory maps the arrays of a model saved with --artifact mmap
+MODEL_FILEPATH = os.environ.get('DISASTER_RESPONSE_MODEL', '../models/classifier.pkl')
+
+class ModelStore:
+    """
+    Holds the model, loaded on first use and loaded again when the model file changes
+
+    At most every check_interval seconds a request compares the modification time
+    of the file with the loaded one. A changed file is loaded on a background
+    thread while requests keep using the current model, which is then replaced
+    with one assignment. A file that does not load, e.g. while it is being written,
+    keeps the current model and is tried again at the next check.
+    """
+
+    def __init__(self, filepath, mmap_mode=None, check_interval=2.0, on_load=None):
+        self.filepath = filepath
+        self.mmap_mode = mmap_mode
+        self.check_interval = check_interval
+        self.on_load = on_load
+        self.model = None
+        self.version = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._checked = 0.0
+
+    def _file_version(self):
+        stat = os.stat(self.filepath)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        version = self._file_version()
+        model = joblib.load(self.filepath, mmap_mode=self.mmap_mode)
+        if self.model is not None:
+            self.reloads += 1
+        self.model, self.version, self.loaded_at, self.error = model, version, time.time(), None
+        if self.on_load is not None:
+            self.on_load()
+
+    def load(self):
+        """
+        Load the model file now
+        """
+        with self._lock:
+            self._load()
+        return self.model
+
+    def _reload(self):
+        try:
+            self._load()
+        except Exception as error:
+            self.error = repr(error)
+            app.logger.warning('Keeping the current model, %s did not load: %r', self.filepath, error)
+        finally:
+            self._lock.release()
+
+    def get(self):
+        """
+        The current model, loaded if there is none yet
+        """
+        if self.model is None:
+            with self._lock:
+                if self.model is None:
+                    self._load()
+            return self.model
+
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            try:
+                changed = self._file_version() != self.version
+            except OSError:
+                changed = False
+            # Only one reload at a time, the lock is released by the reload thread
+            if changed and self._lock.acquire(blocking=False):
+                threading.Thread(target=self._reload, daemon=True).start()
+        return self.model
+
+model_store = ModelStore(MODEL_FILEPATH, mmap_mode='r' if os.environ.get('DISASTER_RESPONSE_MMAP') else None,
+                         check_interval=float(os.environ.get('DISASTER_RESPONSE_MODEL_CHECK', 2)),
+                         on_load=prediction_cache.clear)
+
+def warm_up():
+    """
+    Load the data and the model before the first request
+    """
+    refresh_data()
+    model_store.get()
+
+def classify(messages):
+    """
+    Classify messages with one call of the model
+
+    Returns the labels and the probability of every category being 1, the
+    labels are the probabilities above 0.5 like predict. Models without
+    predict_proba return None probabilities.
+    """
+    model = model_store.get()
+    if not hasattr(model, 'predict_proba'):
+        return np.asarray(model.predict(messages)), None
+
+    probabilities = model.predict_proba(messages)
+    if isinstance(probabilities, list):
+        # one (n, n_classes) array per category, the classes of a category seen only as 0 are [0]
+        clf = getattr(model, 'best_estimator_', model)[-1]
+        # MultiOutputClassifier trained with partial_fit only has the classes of its estimators
+        classes = clf.classes_ if hasattr(clf, 'classes_') else [estimator.classes_ for estimator in clf.estimators_]
+        probabilities = np.column_stack([
+            proba[:, list(category_classes).index(1)] if 1 in category_classes else np.zeros(len(proba))
+            for proba, category_classes in zip(probabilities, classes)
+        ])
+    return (probabilities > 0.5).astype(np.int64), probabilities
+
+
+class MicroBatcher:
+    """
+    Coalesce the messages of concurrent requests into one classify call
+
+    A request waits at most max_wait seconds for other requests to join its batch,
+    the vectorizer and forest overhead is then paid once for the whole batch. The
+    worker thread starts on the first request of every process, so forked servers
+    get their own.
+    """
+
+    def __init__(self, function, max_wait=0.005, max_batch_size=256):
+        self.function = function
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                thread = threading.Thread(target=self._run, args=(self._queue,), daemon=True)
+                thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, messages):
+        """
+        Classify the messages together with the messages of concurrent requests,
+        blocks until the batch is classified
+        """
+        if self._pid != os.getpid():
+            self._start()
+        future = Future()
+        self._queue.put((list(messages), future))
+        return future.result()
+
+    def _run(self, requests):
+        while True:
+            batch = [requests.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(requests.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                size += len(batch[-1][0])
+
+            try:
+                labels, probabilities = self.function([text for messages, _ in batch for text in messages])
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+
+            start = 0
+            for messages, future in batch:
+                stop = start + len(messages)
+                future.set_result((labels[start:stop],
+                                   None if probabilities is None else probabilities[start:stop]))
+                start = stop
+
+batcher = MicroBatcher(classify)
+
+def predict(messages):
+    """
+    Classify messages, the cached ones are answered from the prediction cache and
+    the rest, each distinct message once, by the micro-batcher
+    """
+    # checked before the cache, a new model file empties it even when every message is cached
+    model_store.get()
+    generation = prediction_cache.generation
+    keys = [prediction_cache.key(text) for text in messages]
+    results = [prediction_cache.get(key) for key in keys]
+
+    missing = {}
+    for text, key, result in zip(messages, keys, results):
+        if result is None and key not in missing:
+            missing[key] = text
+    if missing:
+        labels, probabilities = batcher.submit(list(missing.values()))
+        found = {}
+        for i, key in enumerate(missing):
+            found[key] = (labels[i], None if probabilities is None else probabilities[i])
+            prediction_cache.put(key, found[key], generation)
+        results = [found[key] if result is None else result for key, result in zip(keys, results)]
+
+    labels = np.array([result[0] for result in results])
+    if any(result[1] is None for result in results):
+        return labels, None
+    return labels, np.array([result[1] for result in results])
+
+# most messages of one /api/classify request
+MAX_API_MESSAGES = 10000
+
+
+# index webpage displays cool visuals and receives user input text for model
+@app.route('/')
+@app.route('/index')
+def index():
+    
+    # the graphs are built once per version of the data
+    refresh_data()
+    ids, graphJSON = graphs
     
     # render web page with plotly graphs
     return render_template('master.html', ids=ids, graphJSON=graphJSON)
@@ -126,10 +454,11 @@ def index():
 def go():
     # save user input in query
     query = request.args.get('query', '') 
+    refresh_data()
 
-    # use model to predict classification for query
-    classification_labels = model.predict([query])[0]
-    classification_results = dict(zip(df.columns[4:], classification_labels))
+    # use model to predict classification for query, cached and batched with concurrent requests
+    classification_labels = predict([query])[0][0]
+    classification_results = dict(zip(category_names, classification_labels))
 
     # This will render the go.html Please see that file. 
     return render_template(
@@ -139,6 +468,87 @@ def go():
     )
 
 
+def parse_messages(body):
+    """
+    Messages of a JSON list or {"messages": [...]} request body, with the error
+    and status code of a bad body
+    """
+    messages = body.get('messages') if isinstance(body, dict) else body
+    if not isinstance(messages, list) or not all(isinstance(text, str) for text in messages):
+        return None, 'expected a JSON list of messages or {"messages": [...]}', 400
+    if len(messages) > MAX_API_MESSAGES:
+        return None, 'at most {} messages per request'.format(MAX_API_MESSAGES), 413
+    return messages, None, None
+
+def classification_results(messages):
+    """
+    Labels and probabilities of every category for every message, the response of /api/classify
+    """
+    refresh_data()
+    labels, probabilities = predict(messages) if messages else ([], None)
+    results = []
+    for i, text in enumerate(messages):
+        result = {'message': text, 'labels': dict(zip(category_names, labels[i].tolist()))}
+        if probabilities is not None:
+            result['probabilities'] = dict(zip(category_names, probabilities[i].round(4).tolist()))
+        results.append(result)
+
+    return {'categories': category_names, 'results': results}
+
+
+# JSON API that classifies a list of messages
+@app.route('/api/classify', methods=['POST'])
+def api_classify():
+    """
+    Takes a JSON list of messages, or {"messages": [...]}, and returns the labels
+    and probabilities of every category for every message
+    """
+    messages, error, status = parse_messages(request.get_json(silent=True))
+    if error is not None:
+        return jsonify(error=error), status
+
+    return jsonify(classification_results(messages))
+
+
+# hit rate and size of the prediction cache
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(prediction_cache.stats())
+
+
+# liveness, the process serves requests
+@app.route('/healthz')
+def healthz():
+    return jsonify(status='ok')
+
+
+warm_up_lock = threading.Lock()
+
+def readiness():
+    """
+    Whether the data and the model are loaded, a lazy process starts loading them
+    """
+    ready = model_store.model is not None and loaded_version is not None
+    if not ready and warm_up_lock.acquire(blocking=False):
+        def load():
+            try:
+                warm_up()
+            except Exception as error:
+                app.logger.warning('Warm up failed: %r', error)
+            finally:
+                warm_up_lock.release()
+        threading.Thread(target=load, daemon=True).start()
+
+    return {'ready': ready, 'pid': os.getpid(), 'model': MODEL_FILEPATH, 'model_loaded_at': model_store.loaded_at,
+            'model_reloads': model_store.reloads, 'model_error': model_store.error}
+
+# readiness, the data and the model are loaded
+@app.route('/readyz')
+def readyz():
+    status = readiness()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
 def main():
     app.run(host='0.0.0.0', port=3001, debug=True)
 
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the overload handling of the ASGI app
+"""
+
+import asyncio
+import threading
+import pytest
+
+pytest.importorskip("quart")
+
+import asgi_app
+
+@pytest.mark.parametrize("path, json", [("/go?query=water", False), ("/api/classify", True)])
+def test_full_queue_answers_503_with_retry_after(monkeypatch, path, json):
+    release = threading.Event()
+
+    def blocking_classification(messages):
+        release.wait(10)
+        return {}
+
+    monkeypatch.setattr(asgi_app, "MAX_PENDING", 1)
+    monkeypatch.setattr(asgi_app, "classify_query", blocking_classification)
+    monkeypatch.setattr(asgi_app.run, "classification_results", blocking_classification)
+    monkeypatch.setattr(asgi_app.run, "category_names", ["related"])
+
+    async def send(client):
+        if json:
+            return await client.post(path, json={"messages": ["we need water"]})
+        return await client.get(path)
+
+    async def requests():
+        client = asgi_app.app.test_client()
+        first = asyncio.ensure_future(send(client))
+        # The first classification holds the only place of the queue
+        while asgi_app.pending == 0:
+            await asyncio.sleep(0.01)
+
+        second = await send(client)
+        release.set()
+        return await first, second, await second.get_data(as_text=True)
+
+    try:
+        first, second, body = asyncio.run(asyncio.wait_for(requests(), 10))
+    finally:
+        release.set()
+
+    assert(first.status_code == 200)
+    assert(second.status_code == 503)
+    assert(second.headers["Retry-After"] == "1")
+    assert("overloaded" in body)
+    assert(second.mimetype == ("application/json" if json else "text/html"))
+    assert(asgi_app.pending == 0)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the classification of the app
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+
+import run
+
+MESSAGES = ["we need water", "the bridge collapsed", "send food and water", "people are trapped",
+            "storm flooded the road", "need medical help", "fire in the city", "children are hungry"]
+
+# The last category is never 1, its classifiers only know the class 0
+LABELS = np.array([[1, 0, 0], [0, 1, 0], [1, 0, 0], [0, 1, 0], [0, 1, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]])
+
+def submit_together(batcher, requests):
+    results = [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def target(i):
+        barrier.wait()
+        try:
+            results[i] = batcher.submit(requests[i])
+        except Exception as error:
+            results[i] = error
+
+    threads = [threading.Thread(target = target, args = (i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def write_messages(connection, ids):
+    pd.DataFrame({"id": ids, "message": ["we need water"] * len(ids), "original": "", "genre": "direct",
+                  "related": 1, "request": 0}).to_sql("messages", connection, index=False, if_exists="append")
+    connection.commit()
+
+def test_batcher_splits_results():
+    calls = []
+
+    def function(messages):
+        calls.append(list(messages))
+        labels = np.array([[len(text)] for text in messages])
+        return labels, labels / 10
+
+    batcher = run.MicroBatcher(function, max_wait = 0.5)
+    requests = [["a"], ["bb", "ccc"], ["dddd", "eeeee", "ffffff"], ["ggggggg"]]
+    results = submit_together(batcher, requests)
+
+    assert(len(calls) < len(requests))
+    assert(sum(len(messages) for messages in calls) == 7)
+    for messages, (labels, probabilities) in zip(requests, results):
+        assert(labels.ravel().tolist() == [len(text) for text in messages])
+        assert(np.array_equal(probabilities, labels / 10))
+
+def test_batcher_sets_exception_on_every_future():
+    def function(messages):
+        raise ValueError("model failed")
+
+    batcher = run.MicroBatcher(function, max_wait = 0.5)
+    results = submit_together(batcher, [["a"], ["b"], ["c", "d"]])
+    assert(all(isinstance(result, ValueError) for result in results))
+
+    # The worker keeps running after a failed batch
+    with pytest.raises(ValueError):
+        batcher.submit(["e"])
+
+@pytest.mark.parametrize("classifier", [
+    MultiOutputClassifier(RandomForestClassifier(n_estimators = 10, random_state = 0)),
+    OneVsRestClassifier(SGDClassifier(loss = "modified_huber", random_state = 0))])
+def test_classify_matches_predict(tmp_path, monkeypatch, classifier):
+    model = Pipeline([("vect", CountVectorizer()), ("clf", classifier)])
+    if isinstance(classifier, OneVsRestClassifier):
+        # OneVsRestClassifier takes no category without a positive label
+        model.fit(MESSAGES, LABELS[:, :2])
+    else:
+        model.fit(MESSAGES, LABELS)
+    model_filepath = str(tmp_path / "classifier.pkl")
+    joblib.dump(model, model_filepath)
+    monkeypatch.setattr(run, "model_store", run.ModelStore(model_filepath))
+
+    messages = MESSAGES + ["water for the city", "nothing related"]
+    labels, probabilities = run.classify(messages)
+    assert(np.array_equal(labels, model.predict(messages)))
+    assert(np.array_equal(labels, probabilities > 0.5))
+
+def test_parse_messages():
+    assert(run.parse_messages(["a", "b"]) == (["a", "b"], None, None))
+    assert(run.parse_messages({"messages": ["a"]}) == (["a"], None, None))
+    for body in [None, "a", {"message": ["a"]}, ["a", 1], {"messages": "a"}]:
+        messages, error, status = run.parse_messages(body)
+        assert(messages is None and error and status == 400)
+
+def test_parse_messages_too_many(monkeypatch):
+    monkeypatch.setattr(run, "MAX_API_MESSAGES", 2)
+    assert(run.parse_messages(["a", "b"])[2] is None)
+    messages, error, status = run.parse_messages(["a", "b", "c"])
+    assert(messages is None and error and status == 413)
+
+def test_cache_key_normalizes_messages():
+    cache = run.PredictionCache()
+    assert(cache.key("We need WATER!!") == cache.key("we  need water"))
+
+def test_cache_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(run.time, "monotonic", lambda: clock[0])
+    cache = run.PredictionCache(ttl = 10)
+    cache.put("a", 1, cache.generation)
+    clock[0] += 10
+    assert(cache.get("a") == 1)
+    clock[0] += 0.5
+    assert(cache.get("a") is None)
+    assert(cache.stats()["expired"] == 1 and cache.stats()["size"] == 0)
+
+def test_cache_lru_eviction():
+    cache = run.PredictionCache(maxsize = 2)
+    cache.put("a", 1, cache.generation)
+    cache.put("b", 2, cache.generation)
+    # A hit makes "a" the most recent, "b" is evicted
+    assert(cache.get("a") == 1)
+    cache.put("c", 3, cache.generation)
+    assert(cache.get("b") is None)
+    assert(cache.get("a") == 1 and cache.get("c") == 3)
+    assert(cache.stats()["evictions"] == 1)
+
+def test_cache_generation_guard():
+    cache = run.PredictionCache()
+    cache.put("a", 1, cache.generation)
+    generation = cache.generation
+    cache.clear()
+    assert(cache.get("a") is None)
+    # A prediction of the model before clear() is not cached
+    cache.put("b", 2, generation)
+    assert(cache.get("b") is None)
+    cache.put("b", 2, cache.generation)
+    assert(cache.get("b") == 2)
+
+def test_cache_disabled():
+    cache = run.PredictionCache(maxsize = 0)
+    cache.put("a", 1, cache.generation)
+    assert(cache.get("a") is None)
+
+def test_predict_does_not_cache_across_clear(tmp_path, monkeypatch):
+    model_filepath = str(tmp_path / "classifier.pkl")
+    joblib.dump(Pipeline([("vect", CountVectorizer()), ("clf", RandomForestClassifier(random_state = 0))])
+                .fit(MESSAGES, LABELS), model_filepath)
+    cache = run.PredictionCache()
+
+    # The model is reloaded while the batch is classified
+    def function(messages):
+        cache.clear()
+        return np.ones((len(messages), 3), dtype = np.int64), None
+
+    monkeypatch.setattr(run, "model_store", run.ModelStore(model_filepath))
+    monkeypatch.setattr(run, "prediction_cache", cache)
+    monkeypatch.setattr(run, "batcher", run.MicroBatcher(function))
+    labels, probabilities = run.predict(["we need water", "We need water!"])
+    assert(labels.tolist() == [[1, 1, 1], [1, 1, 1]] and probabilities is None)
+    assert(cache.stats()["size"] == 0)
+
+def test_predict_reloads_model_on_cache_hits(tmp_path, monkeypatch):
+    model_filepath = str(tmp_path / "classifier.pkl")
+    model = Pipeline([("vect", CountVectorizer()), ("clf", RandomForestClassifier(random_state = 0))])
+    joblib.dump(model.fit(MESSAGES, LABELS), model_filepath)
+    cache = run.PredictionCache()
+    store = run.ModelStore(model_filepath, check_interval = 0, on_load = cache.clear)
+    monkeypatch.setattr(run, "model_store", store)
+    monkeypatch.setattr(run, "prediction_cache", cache)
+    monkeypatch.setattr(run, "batcher", run.MicroBatcher(run.classify))
+
+    run.predict(["we need water"])
+    run.predict(["we need water"])
+    assert(cache.stats()["hits"] == 1 and cache.stats()["size"] == 1)
+    generation = cache.generation
+
+    # A new model file replaces the old one while every request is a cache hit
+    joblib.dump(model.fit(MESSAGES, 1 - LABELS), model_filepath + ".tmp")
+    os.replace(model_filepath + ".tmp", model_filepath)
+    os.utime(model_filepath, ns = (0, 0))
+    deadline = time.monotonic() + 10
+    while store.reloads == 0 and time.monotonic() < deadline:
+        run.predict(["we need water"])
+        time.sleep(0.01)
+
+    assert(store.reloads == 1)
+    assert(cache.generation == generation + 1)
+    labels, _ = run.predict(["we need water"])
+    assert(np.array_equal(labels, model.predict(["we need water"])))
+
+def test_refresh_data_rebuilds_once_per_change(tmp_path, monkeypatch):
+    database_filepath = str(tmp_path / "messages.db")
+    with sqlite3.connect(database_filepath) as connection:
+        write_messages(connection, [1, 2, 3])
+
+    builds = []
+    build_graphs = run.build_graphs
+
+    def counting_build_graphs(df, category_names):
+        builds.append(len(df))
+        return build_graphs(df, category_names)
+
+    monkeypatch.setattr(run, "DATA_FILEPATH", database_filepath)
+    for name in ["loaded_version", "df", "category_names", "graphs"]:
+        monkeypatch.setattr(run, name, None)
+    monkeypatch.setattr(run, "build_graphs", counting_build_graphs)
+
+    def refresh_concurrently():
+        threads = [threading.Thread(target=run.refresh_data) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        run.refresh_data()
+
+    refresh_concurrently()
+    assert(builds == [3])
+    assert(run.category_names == ["related", "request"])
+
+    # The database file is written over
+    with sqlite3.connect(database_filepath) as connection:
+        write_messages(connection, [4, 5])
+    os.utime(database_filepath, ns=(0, 0))
+    refresh_concurrently()
+    assert(builds == [3, 5])
+    assert(len(run.df) == 5)
+
+    # The changes of process_data.py --upsert stay in the write-ahead log, the database file does not change
+    connection = sqlite3.connect(database_filepath)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA wal_autocheckpoint=0")
+        stat = os.stat(database_filepath)
+        write_messages(connection, [6])
+        assert(os.path.exists(database_filepath + "-wal"))
+        os.utime(database_filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        refresh_concurrently()
+        assert(builds == [3, 5, 6])
+
+        write_messages(connection, [7, 8])
+        refresh_concurrently()
+        assert(builds == [3, 5, 6, 8])
+        assert(sorted(run.df.id) == list(range(1, 9)))
+    finally:
+        connection.close()
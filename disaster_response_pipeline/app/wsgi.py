@@ -0,0 +1,20 @@
+"""
+WSGI entry point of the app, run in the app's directory with gunicorn:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app the data and the model are loaded once in the gunicorn master
+and the forked workers share their memory copy on write.
+"""
+import gc
+import os
+
+import run
+from run import app
+
+# DISASTER_RESPONSE_LAZY=1 loads on the first request of every worker instead
+if os.environ.get('DISASTER_RESPONSE_LAZY') != '1':
+    run.warm_up()
+    # the garbage collector of a worker would write to the pages of every loaded
+    # object it visits, frozen objects are skipped and stay shared
+    gc.freeze()
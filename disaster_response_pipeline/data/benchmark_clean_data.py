@@ -0,0 +1,33 @@
+# Import libraries
+import sys
+import time
+from process_data import load_data, clean_data
+
+# Compare the two category parsing paths of clean_data
+def main():
+    if len(sys.argv) == 3:
+
+        messages_filepath, categories_filepath = sys.argv[1:]
+
+        print('Loading data...\n    MESSAGES: {}\n    CATEGORIES: {}'
+              .format(messages_filepath, categories_filepath))
+        df = load_data(messages_filepath, categories_filepath)
+
+        results = {}
+        for vectorized in [False, True]:
+            start = time.perf_counter()
+            results[vectorized] = clean_data(df.copy(), vectorized = vectorized)
+            print('{:>22}: {:.3f}s'.format('vectorized' if vectorized else 'column by column',
+                                           time.perf_counter() - start))
+
+        same = results[True].astype("int64", errors = "ignore").equals(results[False].astype("int64", errors = "ignore"))
+        print('Same result: {}'.format(same))
+
+    else:
+        print('Please provide the filepaths of the messages and categories '\
+              'datasets as the first and second argument respectively. '\
+              '\n\nExample: python benchmark_clean_data.py '\
+              'disaster_messages.csv disaster_categories.csv')
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
 # Import libraries
+import os
 import sys
+import time
+import sqlite3
+import argparse
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 
 # Load datasets
 def load_data(messages_filepath, categories_filepath):
@@ -25,24 +30,113 @@ def load_data(messages_filepath, categories_filepath):
     
     return df
 
+# Parse the categories strings into a label matrix
+def parse_categories(categories):
+    """
+    Method for converting 'related-1;request-0;...' strings into a uint8 label matrix
+
+    Every row must list the same categories in the same order, otherwise a ValueError
+    names the first rows that differ. When every row has the layout of the first row
+    with single digit values, the labels are read and the schema is checked on one
+    ASCII byte matrix; other inputs fall back to regular expressions.
+
+    Args:
+        categories (pandas series): Categories strings
+
+    output:
+        labels (numpy.ndarray): (N, number of categories) uint8 label matrix
+        category_colnames (list): Category names
+    """
+
+    first = categories.iloc[0]
+    category_colnames = [field.rsplit("-", 1)[0] for field in first.split(";")]
+
+    # Byte offset of the value of every field in the first row
+    offsets = np.cumsum([0] + [len(field) + 1 for field in first.split(";")[:-1]])
+    digit_columns = offsets + np.array([len(field) - 1 for field in first.split(";")])
+
+    if (categories.str.len() == len(first)).all():
+        try:
+            buffer = "".join(categories.tolist()).encode("ascii")
+        except UnicodeEncodeError:
+            buffer = None
+
+        if buffer is not None:
+            matrix = np.frombuffer(buffer, dtype = np.uint8).reshape(-1, len(first))
+            schema_columns = np.ones(len(first), dtype = bool)
+            schema_columns[digit_columns] = False
+            digits = matrix[:, digit_columns]
+            if (matrix[:, schema_columns] == matrix[0, schema_columns]).all() \
+                    and ((digits >= ord("0")) & (digits <= ord("9"))).all():
+                return digits - np.uint8(ord("0")), category_colnames
+
+    # Validate the schema of every row instead of trusting the first row
+    names = categories.str.replace(r"-\d+", "", regex = True)
+    mismatch = (names != ";".join(category_colnames)).to_numpy()
+    if mismatch.any():
+        raise ValueError("Categories differ from the first row's schema in {} rows, e.g. rows {}"
+                         .format(mismatch.sum(), list(categories.index[mismatch][:5])))
+
+    values = categories.str.replace(r"[^;]*-", "", regex = True)
+    labels = values.str.split(";", expand = True).to_numpy().astype(np.uint8)
+
+    return labels, category_colnames
+
 # Clean the dataset
-def clean_data(df):
+def clean_data(df, vectorized = True):
     """
     Method for cleaning the dataframe obtained from 'load_data'
     
     Args:
         df (pandas dataframe): The merged dataframe from load_data
+        vectorized (bool): Parse the categories in one pass with 'parse_categories',
+            False uses the column by column string conversion
     
     output:
         df (pandas dataframe): Sanitized dataframe
     """
     
+    if vectorized:
+        labels, category_colnames = parse_categories(df.categories)
+
+        # Some rows on related column has value of 2
+        # Replace 2 with 1
+        related = labels[:, category_colnames.index("related")]
+        related[related == 2] = 1
+
+        categories = pd.DataFrame(labels, columns = category_colnames, index = df.index)
+    else:
+        categories = split_categories(df)
+    
+    # Replace categories column in df with new category columns
+    df.drop("categories", axis = 1, inplace = True)
+    
+    # Concatenate the original dataframe with the new `categories` dataframe
+    df = pd.concat([df, categories], axis = 1)
+    
+    # Deduplication
+    df.drop_duplicates(inplace = True)
+    
+    return df
+
+# Split categories column by column
+def split_categories(df):
+    """
+    Method for converting the categories column with a string conversion per category
+
+    Args:
+        df (pandas dataframe): The merged dataframe from load_data
+
+    output:
+        categories (pandas dataframe): One numeric column per category
+    """
+
     # Split categories into separate category columns
     # Ceate a dataframe of the 36 individual category columns
     categories = df.categories.str.split(';', expand = True)
     
     # Select the first row of the categories dataframe
-    row = categories.loc[0]
+    row = categories.iloc[0]
     
     # Use this row to extract a list of new column names for categories
     category_colnames = row.str.split("-").str[0].tolist()
@@ -58,58 +152,298 @@ def clean_data(df):
     # Some rows on related column has value of 2
     # Replace 2 with 1
     categories["related"] = categories["related"].replace(2, 1)
-    
-    # Replace categories column in df with new category columns
-    df.drop("categories", axis = 1, inplace = True)
-    
-    # Concatenate the original dataframe with the new `categories` dataframe
-    df = pd.concat([df, categories], axis = 1)
-    
-    # Deduplication
-    df.drop_duplicates(inplace = True)
-    
-    return df
+
+    return categories
 
 # Save the clean dataset into an sqlite database
-def save_data(df, database_filename):
+def save_data(df, database_filename, if_exists = "fail"):
     """
     Method for saving the clean dataframe into an sqlite database
 
     Args:
         df (pandas dataframe): Sanitized dataframe obtained from 'clean_data'
         database_filename (str): DB filename
+        if_exists (str): "fail", "replace" or "append" when the messages table exists
 
     Output:
         None
     """
 
     engine = create_engine("sqlite:///{}".format(database_filename))
-    df.to_sql("messages", engine, index = False)
+    df.to_sql("messages", engine, index = False, if_exists = if_exists)
+
+# Upsert the clean dataset into an sqlite database
+def upsert_data(df, database_filename, batch_size = 10000):
+    """
+    Method for inserting or updating the clean dataframe in the sqlite database by message id
+
+    The schema changes and the rows are written in a single explicit transaction, with
+    batched executemany, WAL journaling and synchronous=NORMAL, so a failed upsert
+    leaves neither new columns nor new rows behind. The messages table gets a unique index on id
+    and an index on genre; a table created by an earlier full load is deduplicated by
+    id, keeping the last row, before the unique index is created.
+
+    Args:
+        df (pandas dataframe): Sanitized dataframe obtained from 'clean_data'
+        database_filename (str): DB filename
+        batch_size (int): Rows per executemany call
+
+    Output:
+        None
+    """
+
+    # One row per id, the last one wins like a later upsert would
+    df = df.drop_duplicates(subset = "id", keep = "last")
+    columns = list(df.columns)
+    quoted = ['"{}"'.format(column) for column in columns]
+
+    def sqlite_type(dtype):
+        if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            return "INTEGER"
+        if pd.api.types.is_float_dtype(dtype):
+            return "REAL"
+        return "TEXT"
+
+    connection = sqlite3.connect(database_filename, isolation_level = None)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA temp_store = MEMORY")
+
+        # sqlite3 would only begin a transaction before the first INSERT and run the
+        # CREATE and ALTER TABLE statements outside of it, so it is begun explicitly
+        connection.execute("BEGIN")
+        try:
+            connection.execute('CREATE TABLE IF NOT EXISTS messages ({})'.format(
+                ", ".join("{} {}".format(q, sqlite_type(df[c].dtype)) for q, c in zip(quoted, columns))))
+
+            # Add categories that are new to an existing table
+            existing = [row[1] for row in connection.execute('PRAGMA table_info("messages")')]
+            for q, c in zip(quoted, columns):
+                if c not in existing:
+                    connection.execute('ALTER TABLE messages ADD COLUMN {} {}'.format(q, sqlite_type(df[c].dtype)))
+
+            indexes = [row[1] for row in connection.execute('PRAGMA index_list("messages")')]
+            if "ix_messages_id" not in indexes:
+                connection.execute('DELETE FROM messages WHERE rowid NOT IN '
+                                   '(SELECT MAX(rowid) FROM messages GROUP BY id)')
+                connection.execute('CREATE UNIQUE INDEX ix_messages_id ON messages (id)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_messages_genre ON messages (genre)')
+
+            sql = 'INSERT INTO messages ({}) VALUES ({}) ON CONFLICT (id) DO UPDATE SET {}'.format(
+                ", ".join(quoted), ", ".join("?" * len(columns)),
+                ", ".join("{0} = excluded.{0}".format(q) for q, c in zip(quoted, columns) if c != "id"))
+
+            for start in range(0, len(df), batch_size):
+                batch = df.iloc[start:start + batch_size].astype(object)
+                batch = batch.where(batch.notna(), None)
+                connection.executemany(sql, batch.itertuples(index = False, name = None))
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    finally:
+        connection.close()
+
+# Export the messages table to a columnar file
+def export_columnar(database_filepath, columnar_filepath, chunksize = 100000):
+    """
+    Method for writing the messages table to a Parquet or Arrow IPC (Feather) file
+
+    The table is copied in chunks. Category labels are stored as uint8 columns, and
+    Arrow IPC files are left uncompressed so that readers can memory map them.
+
+    Args:
+        database_filepath (str): DB filename
+        columnar_filepath (str): .parquet, .feather or .arrow file path
+        chunksize (int): Number of rows per chunk
+
+    Output:
+        None
+    """
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    engine = create_engine("sqlite:///{}".format(database_filepath))
+    writer = None
+    try:
+        with engine.connect() as connection:
+            for chunk in pd.read_sql_query(text("SELECT * FROM messages"), connection, chunksize = chunksize):
+                if writer is None:
+                    # Text columns are fixed to strings so that all-null chunks keep the schema
+                    schema = pa.schema([(column, pa.int64() if column == "id"
+                                         else pa.string() if column in ("message", "original", "genre")
+                                         else pa.uint8()) for column in chunk.columns])
+                    if columnar_filepath.endswith(".parquet"):
+                        writer = pq.ParquetWriter(columnar_filepath, schema, compression = "zstd")
+                    else:
+                        writer = pa.ipc.new_file(columnar_filepath, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema = schema, preserve_index = False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+# Load datasets in chunks
+def load_data_chunks(messages_filepath, categories_filepath, staging_filepath, chunksize):
+    """
+    Method for joining the messages and categories CSV files chunk by chunk
+
+    Both files are copied in chunks into tables of a staging sqlite database, indexed
+    on id, and the outer join on id is read back in chunks, so neither file is held in
+    memory. The staging database is a separate file so that the chunks can be saved
+    while the join is read; it is removed once every chunk is read.
+
+    Args:
+        messages_filepath (str): The .csv file path of messages dataset
+        categories_filepath (str): The .csv file path of categories dataset
+        staging_filepath (str): Filename of the staging sqlite database
+        chunksize (int): Number of rows per chunk
+
+    output:
+        generator of pandas dataframe: Merged chunks of messages and categories
+    """
+
+    engine = create_engine("sqlite:///{}".format(staging_filepath))
+
+    # Stage both datasets
+    for table, filepath in [("staging_messages", messages_filepath), ("staging_categories", categories_filepath)]:
+        for i, chunk in enumerate(pd.read_csv(filepath, chunksize = chunksize)):
+            chunk.to_sql(table, engine, index = False, if_exists = "replace" if i == 0 else "append")
+    message_columns = pd.read_csv(messages_filepath, nrows = 0).columns
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE INDEX ix_staging_messages_id ON staging_messages (id)"))
+        connection.execute(text("CREATE INDEX ix_staging_categories_id ON staging_categories (id)"))
+
+    # SQLite has no FULL OUTER JOIN, a left join plus the unmatched categories is the same
+    query = """
+        SELECT {messages}, c.categories
+        FROM staging_messages m LEFT JOIN staging_categories c ON m.id = c.id
+        UNION ALL
+        SELECT c.id, {nulls}, c.categories
+        FROM staging_categories c
+        WHERE NOT EXISTS (SELECT 1 FROM staging_messages m WHERE m.id = c.id)
+    """.format(messages = ", ".join('m."{}"'.format(column) for column in message_columns),
+               nulls = ", ".join("NULL" for column in message_columns if column != "id"))
+
+    try:
+        with engine.connect() as connection:
+            for chunk in pd.read_sql_query(text(query), connection, chunksize = chunksize):
+                yield chunk
+    finally:
+        engine.dispose()
+        os.remove(staging_filepath)
+
+# Remove duplicate rows left by chunked loading
+def drop_duplicates_table(database_filepath):
+    """
+    Method for deduplicating the messages table inside the database
+
+    Duplicates that land in different chunks are removed by SQLite, keeping the
+    first copy of every row.
+
+    Args:
+        database_filepath (str): DB filename
+    """
+
+    engine = create_engine("sqlite:///{}".format(database_filepath))
+    with engine.begin() as connection:
+        columns = [row[1] for row in connection.execute(text('PRAGMA table_info("messages")'))]
+        connection.execute(text('DELETE FROM messages WHERE rowid NOT IN '
+                                '(SELECT MIN(rowid) FROM messages GROUP BY {})'
+                                .format(", ".join('"{}"'.format(column) for column in columns))))
+
+# Run ETL in chunks with bounded memory
+def stream_data(messages_filepath, categories_filepath, database_filepath, chunksize, upsert = False):
+    """
+    Method for loading, cleaning and saving the datasets chunk by chunk
+
+    Args:
+        messages_filepath (str): The .csv file path of messages dataset
+        categories_filepath (str): The .csv file path of categories dataset
+        database_filepath (str): DB filename
+        chunksize (int): Number of rows per chunk
+        upsert (bool): Upsert every chunk by message id with 'upsert_data'
+
+    Output:
+        rows (int): Number of rows written before deduplication
+    """
+
+    start = time.time()
+    rows = 0
+    staging_filepath = "{}.staging".format(database_filepath)
+    for i, chunk in enumerate(load_data_chunks(messages_filepath, categories_filepath,
+                                               staging_filepath, chunksize)):
+        chunk = clean_data(chunk)
+        if upsert:
+            upsert_data(chunk, database_filepath)
+        else:
+            save_data(chunk, database_filepath, if_exists = "fail" if i == 0 else "append")
+        rows += len(chunk)
+        print('    {} rows saved ({:.0f} rows/s)'.format(rows, rows / max(time.time() - start, 1e-9)))
+
+    if not upsert:
+        drop_duplicates_table(database_filepath)
+
+    return rows
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description = 'Please provide the filepaths of the messages and categories '\
+                      'datasets as the first and second argument respectively, as '\
+                      'well as the filepath of the database to save the cleaned data '\
+                      'to as the third argument.',
+        epilog = 'Example: python process_data.py '\
+                 'disaster_messages.csv disaster_categories.csv '\
+                 'DisasterResponse.db')
+    parser.add_argument('messages_filepath')
+    parser.add_argument('categories_filepath')
+    parser.add_argument('database_filepath')
+    parser.add_argument('--chunksize', type = int, default = None,
+                        help = 'stream the datasets in chunks of this many rows with bounded memory')
+    parser.add_argument('--upsert', action = 'store_true',
+                        help = 'insert or update rows by message id into an existing database '\
+                               'instead of creating the messages table')
+    parser.add_argument('--columnar', metavar = 'FILEPATH',
+                        help = 'also export the messages table to a .parquet or .feather/.arrow file, '\
+                               'which train_classifier.py and run.py can load instead of the database')
+
+    return parser.parse_args(args)
 
 def main():
-    if len(sys.argv) == 4:
+    args = parse_args(sys.argv[1:])
+    messages_filepath, categories_filepath, database_filepath = \
+        args.messages_filepath, args.categories_filepath, args.database_filepath
 
-        messages_filepath, categories_filepath, database_filepath = sys.argv[1:]
+    if args.chunksize:
+        print('Streaming data in chunks of {} rows...\n    MESSAGES: {}\n    CATEGORIES: {}\n    DATABASE: {}'
+              .format(args.chunksize, messages_filepath, categories_filepath, database_filepath))
+        stream_data(messages_filepath, categories_filepath, database_filepath, args.chunksize,
+                    upsert = args.upsert)
+        print('Cleaned data saved to database!')
 
+    else:
         print('Loading data...\n    MESSAGES: {}\n    CATEGORIES: {}'
               .format(messages_filepath, categories_filepath))
         df = load_data(messages_filepath, categories_filepath)
 
         print('Cleaning data...')
         df = clean_data(df)
-        
+
         print('Saving data...\n    DATABASE: {}'.format(database_filepath))
-        save_data(df, database_filepath)
-        
+        if args.upsert:
+            upsert_data(df, database_filepath)
+        else:
+            save_data(df, database_filepath)
+
         print('Cleaned data saved to database!')
-    
-    else:
-        print('Please provide the filepaths of the messages and categories '\
-              'datasets as the first and second argument respectively, as '\
-              'well as the filepath of the database to save the cleaned data '\
-              'to as the third argument. \n\nExample: python process_data.py '\
-              'disaster_messages.csv disaster_categories.csv '\
-              'DisasterResponse.db')
+
+    if args.columnar:
+        print('Exporting data...\n    COLUMNAR: {}'.format(args.columnar))
+        export_columnar(database_filepath, args.columnar, chunksize = args.chunksize or 100000)
+
+        print('Cleaned data exported!')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
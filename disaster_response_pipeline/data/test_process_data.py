@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the ETL pipeline
+"""
+
+import os
+import sys
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from process_data import load_data, clean_data, parse_categories, save_data, upsert_data, stream_data
+from process_data import export_columnar
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models"))
+from columnar import read_columnar
+
+CATEGORIES = ["related-1;request-0;offer-0",
+              "related-2;request-1;offer-0",
+              "related-0;request-0;offer-1",
+              "related-1;request-1;offer-0",
+              "related-1;request-0;offer-0"]
+
+def write_csv(directory, categories = CATEGORIES):
+    messages = pd.DataFrame({"id": [1, 2, 3, 4, 1],
+                             "message": ["water please", "food", "we need tents", "help", "water please"],
+                             "original": ["", "", "", "", ""],
+                             "genre": ["direct", "news", "social", "direct", "direct"]})
+    messages_filepath = str(directory / "messages.csv")
+    categories_filepath = str(directory / "categories.csv")
+    messages.to_csv(messages_filepath, index = False)
+    pd.DataFrame({"id": messages.id, "categories": categories}).to_csv(categories_filepath, index = False)
+    return messages_filepath, categories_filepath
+
+def read_messages(database_filepath):
+    with sqlite3.connect(database_filepath) as connection:
+        return pd.read_sql_query("SELECT * FROM messages ORDER BY id", connection)
+
+def test_parse_categories():
+    labels, names = parse_categories(pd.Series(CATEGORIES))
+    assert(names == ["related", "request", "offer"])
+    assert(labels.dtype == np.uint8)
+    assert(np.array_equal(labels[:2], [[1, 0, 0], [2, 1, 0]]))
+
+def test_parse_categories_fallback():
+    # Two digit values do not fit the byte matrix, the regular expressions read them
+    labels, names = parse_categories(pd.Series(["related-1;request-0", "related-12;request-1"]))
+    assert(names == ["related", "request"])
+    assert(np.array_equal(labels, [[1, 0], [12, 1]]))
+
+def test_parse_categories_schema_mismatch():
+    # Same length, caught on the byte matrix
+    with pytest.raises(ValueError):
+        parse_categories(pd.Series(["related-1;request-0", "related-1;requist-0"]))
+    # Different length, caught by the fallback
+    with pytest.raises(ValueError):
+        parse_categories(pd.Series(["related-1;request-0", "related-1;offer-0"]))
+
+def test_clean_data_vectorized_matches_split(tmp_path):
+    messages_filepath, categories_filepath = write_csv(tmp_path)
+    vectorized = clean_data(load_data(messages_filepath, categories_filepath))
+    split = clean_data(load_data(messages_filepath, categories_filepath), vectorized = False)
+    assert(len(vectorized) == 4)
+    assert(vectorized.related.max() == 1)
+    pd.testing.assert_frame_equal(vectorized, split, check_dtype = False)
+
+def test_upsert_updates_and_adds_columns(tmp_path):
+    database_filepath = str(tmp_path / "messages.db")
+    df = pd.DataFrame({"id": [1, 2], "message": ["a", "b"], "genre": ["direct", "news"], "related": [0, 1]})
+    upsert_data(df, database_filepath)
+
+    update = pd.DataFrame({"id": [2, 3], "message": ["b2", "c"], "genre": ["news", "social"],
+                           "related": [0, 1], "offer": [1, 0]})
+    upsert_data(update, database_filepath, batch_size = 1)
+
+    messages = read_messages(database_filepath)
+    assert(messages.id.tolist() == [1, 2, 3])
+    assert(messages.message.tolist() == ["a", "b2", "c"])
+    assert(messages.related.tolist() == [0, 0, 1])
+    assert(messages.offer.isna().tolist() == [True, False, False])
+
+def test_upsert_rolls_back_schema_changes(tmp_path):
+    database_filepath = str(tmp_path / "messages.db")
+    df = pd.DataFrame({"id": [1], "message": ["a"], "genre": ["direct"], "related": [0]})
+    upsert_data(df, database_filepath)
+
+    # The new column is added before the rows fail to bind
+    broken = pd.DataFrame({"id": [2], "message": ["b"], "genre": ["news"], "related": [1], "offer": [{}]})
+    with pytest.raises(sqlite3.Error):
+        upsert_data(broken, database_filepath)
+
+    messages = read_messages(database_filepath)
+    assert(list(messages.columns) == ["id", "message", "genre", "related"])
+    assert(messages.id.tolist() == [1])
+
+@pytest.mark.parametrize("upsert", [False, True])
+def test_stream_data_matches_full_load(tmp_path, upsert):
+    messages_filepath, categories_filepath = write_csv(tmp_path)
+    database_filepath = str(tmp_path / "messages.db")
+    rows = stream_data(messages_filepath, categories_filepath, database_filepath, chunksize = 2, upsert = upsert)
+    assert(rows > 0)
+
+    expected = clean_data(load_data(messages_filepath, categories_filepath))
+    expected = expected.sort_values("id").reset_index(drop = True)
+    messages = read_messages(database_filepath)
+    assert(list(messages.columns) == list(expected.columns))
+    pd.testing.assert_frame_equal(messages.fillna(""), expected.fillna(""), check_dtype = False)
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_export_columnar_round_trip(tmp_path, extension):
+    messages_filepath, categories_filepath = write_csv(tmp_path)
+    database_filepath = str(tmp_path / "messages.db")
+    save_data(clean_data(load_data(messages_filepath, categories_filepath)), database_filepath)
+    columnar_filepath = str(tmp_path / ("messages" + extension))
+    export_columnar(database_filepath, columnar_filepath, chunksize = 2)
+
+    expected = read_messages(database_filepath)
+    df = read_columnar(columnar_filepath).sort_values("id").reset_index(drop = True)
+    assert(list(df.columns) == list(expected.columns))
+    assert((df.dtypes[["related", "request", "offer"]] == np.uint8).all())
+    pd.testing.assert_frame_equal(df.fillna(""), expected.fillna(""), check_dtype = False)
+
+    # Only the needed columns are read
+    assert(list(read_columnar(columnar_filepath, exclude = ("original", "genre")).columns) ==
+           ["id", "message", "related", "request", "offer"])
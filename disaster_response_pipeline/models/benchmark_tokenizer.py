@@ -0,0 +1,58 @@
+# Import libraries
+import re
+import sys
+import time
+import pickle
+
+from nltk.tokenize import word_tokenize
+from nltk.stem import WordNetLemmatizer
+from nltk.corpus import stopwords
+
+from train_classifier import load_data
+from tokenizer import Tokenizer
+
+# Tokenizer as it was before the Tokenizer class
+def tokenize_per_call(text):
+    text = re.sub(r"[^a-zA-Z0-9]", " ", text.lower())
+    tokens = word_tokenize(text)
+    lemmatizer = WordNetLemmatizer()
+
+    clean_tokens = []
+    for tok in tokens:
+        clean_tok = lemmatizer.lemmatize(tok).lower().strip()
+        clean_tokens.append(clean_tok)
+    
+    clean_tokens = [word for word in clean_tokens if word not in stopwords.words("english")]
+    
+    return clean_tokens
+
+# Compare tokens per second of both tokenizers
+def main():
+    if len(sys.argv) in (2, 3):
+        database_filepath = sys.argv[1]
+        n_messages = int(sys.argv[2]) if len(sys.argv) == 3 else 2000
+        X, _, _ = load_data(database_filepath)
+        X = X[:n_messages]
+
+        # Pickling round trip, like GridSearchCV workers receive it
+        tokenizer = pickle.loads(pickle.dumps(Tokenizer()))
+
+        results = {}
+        for name, function in [("per call", tokenize_per_call), ("Tokenizer", tokenizer)]:
+            start = time.perf_counter()
+            results[name] = [function(text) for text in X]
+            elapsed = time.perf_counter() - start
+            n_tokens = sum(len(tokens) for tokens in results[name])
+            print("%10s: %d messages, %d tokens in %.2fs, %.0f tokens/s"
+                  %(name, len(X), n_tokens, elapsed, n_tokens / elapsed))
+
+        print("Same tokens: {}".format(results["per call"] == results["Tokenizer"]))
+
+    else:
+        print('Please provide the filepath of the disaster messages database '\
+              'and optionally the number of messages to tokenize. \n\nExample: python '\
+              'benchmark_tokenizer.py ../data/DisasterResponse.db 2000')
+
+
+if __name__ == '__main__':
+    main()
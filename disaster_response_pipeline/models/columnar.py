@@ -0,0 +1,33 @@
+# Files written by process_data.py --columnar
+COLUMNAR_EXTENSIONS = (".parquet", ".feather", ".arrow")
+
+# Load data from a columnar file
+def read_columnar(filepath, exclude = ()):
+    """
+    Method for reading a Parquet or Arrow IPC (Feather) file written by process_data.py
+
+    Only the needed columns are read and the file is memory mapped.
+
+    Args:
+        filepath (str): .parquet, .feather or .arrow file path
+        exclude (tuple): Columns that are not read
+
+    output:
+        df (pandas dataframe): Columns of the file in file order, without 'exclude'
+    """
+
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    if filepath.endswith(".parquet"):
+        names = pq.read_schema(filepath, memory_map = True).names
+        columns = [column for column in names if column not in exclude]
+        table = pq.read_table(filepath, columns = columns, memory_map = True)
+    else:
+        with pa.memory_map(filepath) as source:
+            names = pa.ipc.open_file(source).schema.names
+        columns = [column for column in names if column not in exclude]
+        table = feather.read_table(filepath, columns = columns, memory_map = True)
+
+    return table.to_pandas()
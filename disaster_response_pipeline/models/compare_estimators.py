@@ -0,0 +1,106 @@
+# Import libraries
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from train_classifier import load_data, tokenize_corpus, build_pipeline, evaluate_model, with_tokenizer, save_model
+from train_classifier import ESTIMATORS
+
+# Fit, time and evaluate one classifier
+def compare(estimator, X_train, Y_train, X_test, Y_test, messages, category_names):
+    """
+    Method for measuring one classifier of build_pipeline with its default parameters
+
+    Args:
+        estimator (str): Classifier, see ESTIMATORS
+        X_train, Y_train, X_test, Y_test (numpy ndarray): Tokenized messages and categories
+        messages (numpy ndarray): Raw test messages for the single message latency
+        category_names (list): Labels for categories
+
+    output:
+        result (dict): fit_seconds, predict_ms_per_message, single_message_ms, model_bytes,
+            f1 of every category and the averages
+    """
+
+    model = build_pipeline(estimator)
+    start = time.perf_counter()
+    model.fit(X_train, Y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = evaluate_model(model, X_test, Y_test, category_names, verbose = False)
+    predict_seconds = time.perf_counter() - start
+
+    # A request of the web app, one raw message tokenized and classified
+    model = with_tokenizer(model)
+    single = []
+    for text in messages[:50]:
+        start = time.perf_counter()
+        model.predict([text])
+        single.append(time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_filepath = os.path.join(directory, "classifier.pkl")
+        save_model(model, model_filepath)
+        model_bytes = os.path.getsize(model_filepath)
+
+    return {"estimator": estimator,
+            "fit_seconds": fit_seconds,
+            "predict_ms_per_message": 1000 * predict_seconds / len(X_test),
+            "single_message_ms": 1000 * float(np.median(single)),
+            "model_bytes": model_bytes,
+            "f1": {name: report[name]["f1-score"] for name in category_names + ["micro avg", "macro avg", "samples avg"]}}
+
+# Print the comparison
+def print_results(results, category_names):
+    print("\n%12s %10s %14s %14s %10s %10s %10s" %("estimator", "fit (s)", "predict (ms)", "single (ms)",
+                                                   "size (MB)", "micro F1", "macro F1"))
+    for result in results:
+        print("%12s %10.1f %14.3f %14.2f %10.2f %10.3f %10.3f" %(result["estimator"], result["fit_seconds"],
+                                                                result["predict_ms_per_message"],
+                                                                result["single_message_ms"],
+                                                                result["model_bytes"] / 2 ** 20,
+                                                                result["f1"]["micro avg"],
+                                                                result["f1"]["macro avg"]))
+
+    print("\n%25s" %"F1" + "".join("%12s" %result["estimator"] for result in results))
+    for name in category_names:
+        print("%25s" %name + "".join("%12.3f" %result["f1"][name] for result in results))
+
+# Compare the classifiers of build_pipeline
+def main():
+    parser = argparse.ArgumentParser(description = 'Compare fit time, predict latency, model size and F1 of the classifiers')
+    parser.add_argument('database_filepath', help = 'sqlite database, or a .parquet/.feather/.arrow file')
+    parser.add_argument('--estimators', nargs = '+', choices = ESTIMATORS, default = list(ESTIMATORS))
+    parser.add_argument('--n-messages', type = int, help = 'use only the first messages')
+    parser.add_argument('--output', help = 'JSON file to save the results to')
+    args = parser.parse_args()
+
+    X, Y, category_names = load_data(args.database_filepath)
+    if args.n_messages:
+        X, Y = X[:args.n_messages], Y[:args.n_messages]
+
+    X = np.asarray(X, dtype = object)
+    tokens = tokenize_corpus(X)
+    X_train, X_test, Y_train, Y_test, _, messages = train_test_split(tokens, Y, X, test_size = 0.2, random_state = 0)
+
+    results = []
+    for estimator in args.estimators:
+        print('Training {}...'.format(estimator), flush = True)
+        results.append(compare(estimator, X_train, Y_train, X_test, Y_test, messages, category_names))
+
+    print_results(results, category_names)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent = 2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
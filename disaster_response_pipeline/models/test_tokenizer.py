@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the tokenizer shared by the training scripts and the app
+"""
+
+import pickle
+import pytest
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+
+try:
+    stopwords.words("english")
+    word_tokenize("nltk data")
+except LookupError:
+    pytest.skip("the NLTK punkt, wordnet and stopwords data are not downloaded", allow_module_level = True)
+
+from tokenizer import Tokenizer, pretokenized
+from benchmark_tokenizer import tokenize_per_call
+
+MESSAGES = ["We need WATER and food in Port-au-Prince!!",
+            "The bridges are collapsed, 3 people trapped",
+            "Is anyone helping the children? They're hungry.",
+            ""]
+
+def test_tokenizer_matches_per_call_tokenizer():
+    tokenize = Tokenizer()
+    for text in MESSAGES:
+        assert(tokenize(text) == tokenize_per_call(text))
+
+def test_tokenizer_pickles():
+    tokenize = Tokenizer(cache_size = 16)
+    tokenize(MESSAGES[0])
+    state = pickle.dumps(tokenize)
+    # The lemmatizer, stopwords and cache are rebuilt, not pickled
+    assert(b"lemmatizer" not in state)
+
+    unpickled = pickle.loads(state)
+    assert(unpickled.cache_size == 16)
+    assert(unpickled.lemmatize.cache_info().currsize == 0)
+    for text in MESSAGES:
+        assert(unpickled(text) == tokenize(text))
+
+def test_tokenizer_rejects_token_lists():
+    with pytest.raises(TypeError):
+        Tokenizer()(["we", "need", "water"])
+    with pytest.raises(TypeError):
+        pretokenized("we need water")
+    assert(pretokenized(["we", "need", "water"]) == ["we", "need", "water"])
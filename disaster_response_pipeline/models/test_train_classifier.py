@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the ML pipeline
+"""
+
+import os
+import re
+import time
+import sqlite3
+import pickle
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from scipy.stats import loguniform
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from nltk.tokenize import word_tokenize
+from nltk.corpus import stopwords
+
+try:
+    stopwords.words("english")
+    word_tokenize("nltk data")
+except LookupError:
+    pytest.skip("the NLTK punkt, wordnet and stopwords data are not downloaded", allow_module_level = True)
+
+import train_classifier
+from tokenizer import Tokenizer
+from train_classifier import tokenize_corpus, build_pipeline, with_tokenizer, BudgetedRandomSearchCV
+from train_classifier import read_batches, train_out_of_core, evaluate_out_of_core, slim_model, save_model
+from vocabulary import CompactCountVectorizer
+
+MESSAGES = np.array(["we need water", "the bridge collapsed", "send food and water", "people are trapped",
+                     "storm flooded the road", "need medical help", "fire in the city", "children are hungry",
+                     "water is running out", "roads are blocked by the flood", "we need tents and food",
+                     "many people are injured"], dtype = object)
+
+LABELS = np.array([[1, 0], [0, 1], [1, 0], [0, 1], [0, 1], [1, 0], [0, 1], [1, 1],
+                   [1, 0], [0, 1], [1, 0], [0, 1]])
+
+class KeepDigitsApart(Tokenizer):
+    pattern = re.compile(r"[^a-zA-Z]")
+
+class SlowClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Classifier predicting the most frequent labels, every fit takes delay seconds
+    """
+
+    def __init__(self, delay = 0.02, alpha = 1.0):
+        self.delay = delay
+        self.alpha = alpha
+
+    def fit(self, X, Y):
+        time.sleep(self.delay)
+        self.labels_ = (np.asarray(Y).mean(axis = 0) >= 0.5).astype(int)
+        return self
+
+    def predict(self, X):
+        return np.tile(self.labels_, (len(X), 1))
+
+def write_database(directory):
+    database_filepath = str(directory / "messages.db")
+    df = pd.DataFrame({"id": np.arange(1, len(MESSAGES) + 1), "message": MESSAGES, "original": "", "genre": "direct",
+                       "related": LABELS[:, 0], "request": LABELS[:, 1]})
+    with sqlite3.connect(database_filepath) as connection:
+        df.to_sql("messages", connection, index = False)
+    return database_filepath
+
+def test_token_cache_hit_matches_fresh_run(tmp_path, capsys):
+    fresh = tokenize_corpus(MESSAGES)
+    first = tokenize_corpus(MESSAGES, str(tmp_path))
+    assert("Saved token cache" in capsys.readouterr().out)
+    second = tokenize_corpus(MESSAGES, str(tmp_path))
+    assert("Loaded token cache" in capsys.readouterr().out)
+    assert(list(first) == list(fresh) and list(second) == list(fresh))
+    assert(len(os.listdir(tmp_path)) == 1)
+
+def test_token_cache_misses_on_changed_tokenizer(tmp_path, capsys, monkeypatch):
+    tokenize_corpus(MESSAGES, str(tmp_path))
+    tokenize_corpus(MESSAGES, str(tmp_path), KeepDigitsApart())
+    assert(capsys.readouterr().out.count("Saved token cache") == 2)
+
+    # A new tokenizer version of the same class misses too
+    monkeypatch.setattr(Tokenizer, "version", Tokenizer.version + "-test")
+    tokenize_corpus(MESSAGES, str(tmp_path))
+    assert("Saved token cache" in capsys.readouterr().out)
+    assert(len(os.listdir(tmp_path)) == 3)
+
+@pytest.mark.parametrize("vectorizer", ["count", "hashing"])
+def test_with_tokenizer_takes_raw_messages(vectorizer):
+    tokens = tokenize_corpus(MESSAGES)
+    model = build_pipeline("linear", vectorizer, n_features = 2 ** 10).fit(tokens, LABELS)
+    expected = model.predict(tokens)
+
+    model = with_tokenizer(model)
+    assert(model.named_steps["vect"].analyzer is train_classifier.tokenize)
+    assert(np.array_equal(model.predict(MESSAGES), expected))
+
+def test_budgeted_search_stops_when_budget_is_spent():
+    search = BudgetedRandomSearchCV(SlowClassifier(), {"alpha": loguniform(0.1, 10)}, n_iter = 100,
+                                    time_budget = 0.5, cv = 2)
+    search.fit(MESSAGES, LABELS)
+    # Every candidate and the refit take about 0.02s per fit, 100 candidates take 4s
+    assert(1 < len(search.cv_results_["params"]) < 100)
+    assert(search.search_time_ < 1.0)
+    assert(search.refit_time_ >= 0.02)
+
+def test_budgeted_search_results():
+    tokens = tokenize_corpus(MESSAGES)
+    search = BudgetedRandomSearchCV(build_pipeline("linear"), train_classifier.DISTRIBUTIONS["linear"], n_iter = 3,
+                                    scoring = "f1_samples", cv = 3)
+    search.fit(tokens, LABELS)
+
+    results = search.cv_results_
+    assert(len(results["params"]) == 3)
+    for key in ["mean_fit_time", "mean_test_score", "std_test_score"]:
+        assert(results[key].shape == (3,))
+    assert(search.best_params_ == results["params"][search.best_index_])
+    assert(search.best_score_ == results["mean_test_score"].max())
+    assert(search.best_estimator_.get_params()["clf__estimator__alpha"] == search.best_params_["clf__estimator__alpha"])
+    expected = search.predict(tokens)
+    assert(np.array_equal(expected, search.best_estimator_.predict(tokens)))
+    assert(0 <= search.score(tokens, LABELS) <= 1)
+
+    # A BaseEstimator, clone copies the settings without the results
+    copy = clone(search.set_params(n_iter = 2))
+    assert(copy.get_params()["n_iter"] == 2 and not hasattr(copy, "cv_results_"))
+
+    model = with_tokenizer(search)
+    assert(model is search.best_estimator_)
+    assert(np.array_equal(model.predict(MESSAGES), expected))
+
+def test_budgeted_search_zero_budget_fits_one_candidate():
+    search = BudgetedRandomSearchCV(SlowClassifier(delay = 0), {"alpha": loguniform(0.1, 10)}, n_iter = 10,
+                                    time_budget = 0, cv = 2)
+    search.fit(MESSAGES, LABELS)
+    assert(len(search.cv_results_["params"]) == 1)
+    assert(search.predict(MESSAGES[:2]).shape == (2, 2))
+
+def test_read_batches_holds_out_every_fifth_id(tmp_path):
+    database_filepath = write_database(tmp_path)
+    train = list(read_batches(database_filepath, holdout = False, batch_size = 3))
+    test = list(read_batches(database_filepath, holdout = True, batch_size = 3))
+
+    assert([len(X) for X, Y, names in train] == [3, 3, 3, 1])
+    assert([len(X) for X, Y, names in test] == [2])
+    assert(all(names == ["related", "request"] for X, Y, names in train + test))
+    # Messages 5 and 10 are held out
+    assert(list(test[0][0]) == [MESSAGES[4], MESSAGES[9]])
+    assert(np.array_equal(test[0][1], LABELS[[4, 9]]))
+    train_messages = np.concatenate([X for X, Y, names in train])
+    assert(sorted(train_messages) == sorted(np.delete(MESSAGES, [4, 9])))
+
+def test_train_out_of_core_fits_every_batch(tmp_path, monkeypatch):
+    database_filepath = write_database(tmp_path)
+    batches = []
+    partial_fit = train_classifier.MultiOutputClassifier.partial_fit
+
+    def counting_partial_fit(self, X, Y, **kwargs):
+        batches.append(X.shape[0])
+        return partial_fit(self, X, Y, **kwargs)
+
+    monkeypatch.setattr(train_classifier.MultiOutputClassifier, "partial_fit", counting_partial_fit)
+    model, category_names = train_out_of_core(database_filepath, n_features = 2 ** 10, batch_size = 3, epochs = 2)
+
+    assert(batches == [3, 3, 3, 1] * 2)
+    assert(category_names == ["related", "request"])
+    assert(all(sp.issparse(estimator.coef_) for estimator in model.named_steps["clf"].estimators_))
+    assert(model.predict(MESSAGES).shape == LABELS.shape)
+    report = evaluate_out_of_core(model, database_filepath, batch_size = 3)
+    assert("related" in report and "request" in report)
+
+def test_slim_model_sparsifies_hashing_weights():
+    tokens = tokenize_corpus(MESSAGES)
+    model = build_pipeline("linear", "hashing", n_features = 2 ** 10).fit(tokens, LABELS)
+    expected = model.predict(tokens)
+
+    model = slim_model(model)
+    assert(all(sp.issparse(estimator.coef_) for estimator in model.named_steps["clf"].estimators_))
+    assert(np.array_equal(model.predict(MESSAGES), expected))
+
+def test_compact_count_vectorizer_pickles_vocabulary_as_string():
+    vect = CompactCountVectorizer().fit(MESSAGES)
+    assert(isinstance(vect.__getstate__()["vocabulary_"], str))
+
+    unpickled = pickle.loads(pickle.dumps(vect))
+    assert(unpickled.vocabulary_ == vect.vocabulary_)
+    assert((unpickled.transform(MESSAGES) != vect.transform(MESSAGES)).nnz == 0)
+
+    # A term with a newline is pickled as the dict
+    vect = CompactCountVectorizer(analyzer = lambda text: text.split(" ")).fit(["a b\nc", "d"])
+    assert(isinstance(vect.__getstate__()["vocabulary_"], dict))
+
+@pytest.mark.parametrize("artifact", ["mmap", "compressed"])
+@pytest.mark.parametrize("estimator, vectorizer", [("linear", "count"), ("linear", "hashing"), ("forest", "count")])
+def test_saved_model_predicts_like_fitted_model(tmp_path, artifact, estimator, vectorizer):
+    tokens = tokenize_corpus(MESSAGES)
+    model = build_pipeline(estimator, vectorizer, n_features = 2 ** 10)
+    model.set_params(**({"clf__n_estimators": 10} if estimator == "forest" else {}))
+    model.fit(tokens, LABELS)
+    expected = model.predict(tokens)
+    probabilities = model.predict_proba(tokens)
+
+    model_filepath = str(tmp_path / "classifier.pkl")
+    save_model(model, model_filepath, artifact)
+    assert(os.listdir(tmp_path) == ["classifier.pkl"])
+
+    loaded = joblib.load(model_filepath, mmap_mode = "r" if artifact == "mmap" else None)
+    if vectorizer == "count":
+        assert(isinstance(loaded.named_steps["vect"], CompactCountVectorizer))
+    assert(np.array_equal(loaded.predict(MESSAGES), expected))
+    for loaded_probabilities, fitted_probabilities in zip(loaded.predict_proba(MESSAGES), probabilities):
+        assert(np.allclose(loaded_probabilities, fitted_probabilities, atol = 1e-6))
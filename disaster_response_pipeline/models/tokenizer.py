@@ -0,0 +1,97 @@
+# Import libraries
+import re
+from functools import lru_cache
+
+import nltk
+from nltk.tokenize import word_tokenize
+from nltk.stem import WordNetLemmatizer
+from nltk.corpus import stopwords
+
+# Tokenizer of the training scripts and the app, a model pickled with it refers to
+# tokenizer.Tokenizer whichever script saved or loads it
+class Tokenizer:
+    """
+    Callable tokenizer that builds the lemmatizer and the stopword set once
+
+    Lemmatization results are memoized per token in a bounded LRU cache. Only the
+    cache size is pickled, the lemmatizer, stopwords and cache are rebuilt on
+    unpickling, so the tokenizer works in GridSearchCV(n_jobs = -1) workers and
+    inside the saved model.
+    """
+
+    pattern = re.compile(r"[^a-zA-Z0-9]")
+
+    # Raised whenever a change of the code changes the tokens, it invalidates the token caches
+    version = "1"
+
+    def __init__(self, cache_size = 2 ** 16):
+        """
+        Method for initializing the tokenizer
+
+        Args:
+            cache_size (int): Number of distinct tokens whose lemma is memoized
+        """
+
+        self.cache_size = cache_size
+        self._setup()
+
+    def _setup(self):
+        self.lemmatizer = WordNetLemmatizer()
+        self.stop_words = frozenset(stopwords.words("english"))
+        self.lemmatize = lru_cache(maxsize = self.cache_size)(self._lemmatize)
+
+    def _lemmatize(self, token):
+        return self.lemmatizer.lemmatize(token).lower().strip()
+
+    def __getstate__(self):
+        return {"cache_size": self.cache_size}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+
+    def config(self):
+        """
+        Method for describing everything that decides the tokens, the token cache key is its hash
+
+        output:
+            config (str): Class, version, cleanup pattern, NLTK version and stopwords
+        """
+
+        return "\n".join([type(self).__module__ + "." + type(self).__qualname__, self.version,
+                          self.pattern.pattern, nltk.__version__, " ".join(sorted(self.stop_words))])
+
+    def __call__(self, text):
+        """
+        Method for tokenizing words
+        
+        Args:
+            text (str): Message data for tokenization
+            
+        output:
+            clean_tokens (list): Lemmatized tokens without stopwords
+        """
+
+        if not isinstance(text, str):
+            raise TypeError("Tokenizer takes a message string, got {}".format(type(text).__name__))
+
+        tokens = word_tokenize(self.pattern.sub(" ", text.lower()))
+
+        return [token for token in map(self.lemmatize, tokens) if token not in self.stop_words]
+
+# Analyzer of the messages tokenized by tokenize_corpus
+def pretokenized(tokens):
+    """
+    Method for passing the token list of an already tokenized message through a vectorizer
+
+    Args:
+        tokens (list): Tokens of one message
+
+    output:
+        tokens (list): The same tokens
+    """
+
+    if not isinstance(tokens, (list, tuple)):
+        raise TypeError("pretokenized takes a token list, got {}".format(type(tokens).__name__))
+
+    return tokens
@@ -1,29 +1,40 @@
 # Import libraries
+import os
 import sys
+import time
+import hashlib
+import argparse
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine
 
 import nltk
 nltk.download(['punkt', 'wordnet', "stopwords"])
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-from nltk.corpus import stopwords
-import re
 
 import warnings
 warnings.filterwarnings("ignore")
 
+from scipy.stats import randint, loguniform
+
+from sklearn.base import BaseEstimator, clone
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingGridSearchCV
+from sklearn.model_selection import ParameterSampler, cross_validate, check_cv
 
-from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 
 from sklearn.multioutput import MultiOutputClassifier
-#from sklearn.multiclass import OneVsRestClassifier
+from sklearn.multiclass import OneVsRestClassifier
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+
+import joblib
+from sklearn.metrics import classification_report, accuracy_score, check_scoring
 
-from sklearn.externals import joblib
-from sklearn.metrics import classification_report, accuracy_score
+from columnar import COLUMNAR_EXTENSIONS, read_columnar
+from tokenizer import Tokenizer, pretokenized
+from vocabulary import CompactCountVectorizer
 
 # Load data from database
 def load_data(database_filepath):
@@ -31,7 +42,8 @@ def load_data(database_filepath):
     Method for loading data from the sqlite database
     
     Args:
-        database_filepath (str): sqlite db filepath
+        database_filepath (str): sqlite db filepath, or a .parquet/.feather/.arrow
+            file exported by process_data.py --columnar
         
     output:
         X (numpy.ndarray): Input training dataset
@@ -39,6 +51,14 @@ def load_data(database_filepath):
         category_names: Labels for categories
     """
     
+    if database_filepath.endswith(COLUMNAR_EXTENSIONS):
+        df = read_columnar(database_filepath, exclude = ("id", "original", "genre"))
+        X = df.message.values
+        Y = df[df.columns[1:]].values
+        category_names = list(df.columns[1:])
+
+        return X, Y, category_names
+
     engine = create_engine("sqlite:///{}".format(database_filepath))
     df = pd.read_sql_table("messages", con = engine)
     X = df.message.values
@@ -47,59 +67,339 @@ def load_data(database_filepath):
     
     return X, Y, category_names
 
-def tokenize(text):
+# Tokenizer saved inside the model
+tokenize = Tokenizer()
+
+# Raised whenever the format of the saved token lists changes
+TOKEN_CACHE_VERSION = "1"
+
+# Tokenize the corpus once
+def tokenize_corpus(X, cache_dir = None, tokenizer = None):
     """
-    Method for tokenizing words
-    
+    Method for tokenizing every message once before the grid search
+
+    The model takes the token lists in place of the messages, so the folds and
+    parameter candidates of GridSearchCV do not tokenize the corpus again. With a
+    cache_dir the token lists are saved under a hash of the messages, the tokenizer
+    configuration and TOKEN_CACHE_VERSION, and loaded by later runs on the same
+    data with the same tokenizer.
+
     Args:
-        text (str): Message data for tokenization
+        X (numpy.ndarray): Messages
+        cache_dir (str): Directory of the token cache, None to not cache
+        tokenizer (Tokenizer): Tokenizer of the messages, None for the one saved with the model
         
     output:
-        clean_tokens (str): Result list after tokenization
+        tokens (numpy.ndarray): Object array with the token list of every message
     """
     
-    text = re.sub(r"[^a-zA-Z0-9]", " ", text.lower())
-    tokens = word_tokenize(text)
-    lemmatizer = WordNetLemmatizer()
+    if tokenizer is None:
+        tokenizer = tokenize
 
-    clean_tokens = []
-    for tok in tokens:
-        clean_tok = lemmatizer.lemmatize(tok).lower().strip()
-        clean_tokens.append(clean_tok)
-    
-    clean_tokens = [word for word in clean_tokens if word not in stopwords.words("english")]
-    
-    return clean_tokens
+    cache_filepath = None
+    if cache_dir is not None:
+        digest = hashlib.sha1()
+        digest.update("{}\n{}\0".format(TOKEN_CACHE_VERSION, tokenizer.config()).encode("utf-8"))
+        for text in X:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\0")
+        cache_filepath = os.path.join(cache_dir, "tokens_{}.joblib".format(digest.hexdigest()))
+        if os.path.exists(cache_filepath):
+            print('    Loaded token cache: {}'.format(cache_filepath))
+            return joblib.load(cache_filepath)
 
-# Build ML Model
-def build_model():
+    start = time.perf_counter()
+    tokens = np.empty(len(X), dtype = object)
+    tokens[:] = [tokenizer(text) for text in X]
+    print('    Tokenized {:,} messages in {:.1f}s'.format(len(X), time.perf_counter() - start))
+
+    if cache_filepath is not None:
+        os.makedirs(cache_dir, exist_ok = True)
+        joblib.dump(tokens, cache_filepath)
+        print('    Saved token cache: {}'.format(cache_filepath))
+
+    return tokens
+
+# Search strategies of build_model
+SEARCH_STRATEGIES = ("grid", "halving", "random")
+
+class BudgetedRandomSearchCV(BaseEstimator):
     """
-    Method for training model by creating ML pipeline and Grid Search for finding best parameters
+    Randomized hyperparameter search that stops sampling candidates when the time budget is spent
+
+    Candidates are cross validated one at a time. A new candidate is only started if
+    the time spent so far, the mean time of a candidate and the refit of the best
+    candidate on all the data fit in the budget. The refit is estimated from the
+    slowest fold fit so far, scaled up from the fold to all the samples. At least
+    one candidate is always evaluated and refit, so a zero budget still gives a
+    fitted model. predict and score use the refit best candidate, like GridSearchCV.
+
+    It has get_params, set_params and clone of BaseEstimator, but it is not a drop-in
+    RandomizedSearchCV: cv_results_ only holds params, mean_fit_time, mean_test_score
+    and std_test_score, scoring is one metric and the best candidate is always refit.
+    """
+
+    def __init__(self, estimator, param_distributions, n_iter = 20, time_budget = None, scoring = None,
+                 cv = 5, n_jobs = None, random_state = 0, verbose = 0):
+        """
+        Method for initializing the search
+
+        Args:
+            estimator (estimator): Pipeline to tune
+            param_distributions (dict): Lists or scipy.stats distributions of the parameters
+            n_iter (int): Most candidates to sample
+            time_budget (float): Seconds for the search and the refit, None for no limit
+            scoring (str): Scoring of every candidate
+            cv (int): Number of folds
+            n_jobs (int): Folds cross validated in parallel
+            random_state (int): Seed of the candidate sampling
+            verbose (int): Print every candidate when above 0
+        """
+
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.time_budget = time_budget
+        self.scoring = scoring
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.verbose = verbose
+
+    def fit(self, X, Y):
+        """
+        Method for searching the parameters and refitting the best candidate
+
+        output:
+            self
+        """
+
+        start = time.perf_counter()
+        n_splits = check_cv(self.cv, Y, classifier = True).get_n_splits(X, Y)
+        results = {"params": [], "mean_fit_time": [], "mean_test_score": [], "std_test_score": []}
+        candidates = ParameterSampler(self.param_distributions, n_iter = self.n_iter, random_state = self.random_state)
+        for params in candidates:
+            if results["params"] and self.time_budget is not None:
+                spent = time.perf_counter() - start
+                per_candidate = spent / len(results["params"])
+                # A fold is fit on (n_splits - 1) / n_splits of the samples
+                refit = max(results["mean_fit_time"]) * n_splits / max(n_splits - 1, 1)
+                if spent + per_candidate + refit > self.time_budget:
+                    break
+
+            scores = cross_validate(clone(self.estimator).set_params(**params), X, Y, scoring = self.scoring,
+                                    cv = self.cv, n_jobs = self.n_jobs)
+            results["params"].append(params)
+            results["mean_fit_time"].append(scores["fit_time"].mean())
+            results["mean_test_score"].append(scores["test_score"].mean())
+            results["std_test_score"].append(scores["test_score"].std())
+            if self.verbose > 0:
+                print("    [{}/{}] {:.1f}s score {:.4f} {}".format(len(results["params"]), self.n_iter,
+                                                                   scores["fit_time"].mean(),
+                                                                   scores["test_score"].mean(), params))
+
+        self.cv_results_ = {key: np.array(value) if key != "params" else value for key, value in results.items()}
+        self.best_index_ = int(np.argmax(self.cv_results_["mean_test_score"]))
+        self.best_params_ = results["params"][self.best_index_]
+        self.best_score_ = self.cv_results_["mean_test_score"][self.best_index_]
+        refit_start = time.perf_counter()
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, Y)
+        self.refit_time_ = time.perf_counter() - refit_start
+        self.search_time_ = time.perf_counter() - start
+
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def score(self, X, Y):
+        """
+        Method for scoring the refit best candidate with the scoring of the search
+
+        output:
+            score (float): Score of the best candidate on X, Y
+        """
+
+        return check_scoring(self.best_estimator_, scoring = self.scoring)(self.best_estimator_, X, Y)
+
+# Classifiers of build_model:
+#   multioutput: one RandomForest per category
+#   forest: one RandomForest predicting every category
+#   linear: one SGD linear classifier per category on the sparse tfidf features
+ESTIMATORS = ("multioutput", "forest", "linear")
+
+# Vectorizers of build_pipeline:
+#   count: vocabulary of every token in the corpus, saved with the model as one string
+#   hashing: fixed number of features by hashing the tokens, no vocabulary
+VECTORIZERS = ("count", "hashing")
+
+# Grid search parameters of every classifier
+PARAMETERS = {
+    "multioutput": {
+                'tfidf__smooth_idf':[True, False],
+                'clf__estimator__n_estimators': [100, 110, 120]
+    },
+    "forest": {
+                'tfidf__smooth_idf':[True, False],
+                'clf__n_estimators': [100, 110, 120]
+    },
+    "linear": {
+                'tfidf__smooth_idf':[True, False],
+                'clf__estimator__alpha': [1e-5, 1e-4, 1e-3]
+    }
+}
+
+# Random search distributions of every classifier, more than 150 trees runs out of memory
+DISTRIBUTIONS = {
+    "multioutput": {
+                'tfidf__smooth_idf': [True, False],
+                'clf__estimator__n_estimators': randint(50, 151),
+                'clf__estimator__min_samples_split': [2, 4, 8]
+    },
+    "forest": {
+                'tfidf__smooth_idf': [True, False],
+                'clf__n_estimators': randint(50, 151),
+                'clf__min_samples_split': [2, 4, 8]
+    },
+    "linear": {
+                'tfidf__smooth_idf': [True, False],
+                'clf__estimator__alpha': loguniform(1e-6, 1e-2)
+    }
+}
+
+# Build ML pipeline
+def build_pipeline(estimator = "multioutput", vectorizer = "count", n_features = 2 ** 18):
+    """
+    Method for creating the ML pipeline of a classifier
     
     Args:
-        None
+        estimator (str): "multioutput", "forest" or "linear", see ESTIMATORS
+        vectorizer (str): "count" or "hashing", see VECTORIZERS
+        n_features (int): Number of features of the hashing vectorizer
         
     output:
-        cv_results_ (dict of numpy ndarrays): Cross-validation Result
+        pipeline (Pipeline): Vectorizer, tfidf and classifier, taking tokenized messages
     """
     
+    if estimator not in ESTIMATORS:
+        raise ValueError("estimator must be one of {}, got {!r}".format(ESTIMATORS, estimator))
+    if vectorizer not in VECTORIZERS:
+        raise ValueError("vectorizer must be one of {}, got {!r}".format(VECTORIZERS, vectorizer))
+
+    if estimator == "forest":
+        classifier = RandomForestClassifier(random_state = 0)
+    elif estimator == "linear":
+        # modified_huber gives predict_proba
+        classifier = OneVsRestClassifier(SGDClassifier(loss = "modified_huber", random_state = 0))
+    else:
+        classifier = MultiOutputClassifier(RandomForestClassifier(random_state = 0))
+
+    # Trained on the token lists of tokenize_corpus, with_tokenizer sets the tokenizer
+    # as the analyzer before the model is saved for raw messages
+    if vectorizer == "hashing":
+        # Counts, the tfidf step normalizes them like it does for CountVectorizer
+        vect = HashingVectorizer(analyzer=pretokenized, n_features = n_features, alternate_sign = False, norm = None)
+    else:
+        vect = CompactCountVectorizer(analyzer=pretokenized)
+
     pipeline = Pipeline([
-        ('vect', CountVectorizer(tokenizer=tokenize)),
+        ('vect', vect),
         ('tfidf', TfidfTransformer()),
-        ('clf', MultiOutputClassifier(RandomForestClassifier(random_state = 0)))
+        ('clf', classifier)
     ])
     
-    parameters = {
-                'tfidf__smooth_idf':[True, False],
-                'clf__estimator__n_estimators': [100, 110, 120]
-    }
+    return pipeline
+
+# Build ML Model
+def build_model(search = "grid", time_budget = None, n_iter = 20, min_resources = 1000, estimator = "multioutput",
+                vectorizer = "count", n_features = 2 ** 18):
+    """
+    Method for training model by creating ML pipeline and a hyperparameter search for finding best parameters
     
-    cv = GridSearchCV(pipeline, param_grid = parameters, scoring = 'precision_samples', cv = 5, verbose = 5, n_jobs = -1)
+    Args:
+        search (str): "grid" for GridSearchCV over every candidate, "halving" for successive
+            halving that trains the candidates on a growing number of samples and keeps
+            the best third at every step, "random" for a randomized search within time_budget
+        time_budget (float): Seconds for the random search, None for no limit
+        n_iter (int): Most candidates of the random search
+        min_resources (int): Samples of the first successive halving step
+        estimator (str): Classifier of the pipeline, see ESTIMATORS
+        vectorizer (str): "count" or "hashing", see VECTORIZERS
+        n_features (int): Number of features of the hashing vectorizer
+        
+    output:
+        cv_results_ (dict of numpy ndarrays): Cross-validation Result
+    """
+    
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError("search must be one of {}, got {!r}".format(SEARCH_STRATEGIES, search))
+
+    pipeline = build_pipeline(estimator, vectorizer, n_features)
+    parameters = PARAMETERS[estimator]
+    
+    if search == "halving":
+        # min_resources is given, sklearn can only derive it for single output targets
+        cv = HalvingGridSearchCV(pipeline, param_grid = parameters, scoring = 'precision_samples', cv = 5,
+                                 factor = 3, min_resources = min_resources, random_state = 0,
+                                 verbose = 1, n_jobs = -1)
+    elif search == "random":
+        cv = BudgetedRandomSearchCV(pipeline, DISTRIBUTIONS[estimator], n_iter = n_iter, time_budget = time_budget,
+                                    scoring = 'precision_samples', cv = 5, n_jobs = -1, verbose = 1)
+    else:
+        cv = GridSearchCV(pipeline, param_grid = parameters, scoring = 'precision_samples', cv = 5, verbose = 5, n_jobs = -1)
     
     return cv
 
+# Search report
+def log_search(model):
+    """
+    Method for printing the mean fit time and score of every candidate of the search
+    
+    Args:
+        model: Fitted GridSearchCV, HalvingGridSearchCV or BudgetedRandomSearchCV
+    
+    output:
+        None
+    """
+    
+    results = model.cv_results_
+    for i, params in enumerate(results["params"]):
+        # Successive halving also reports the step and its number of samples
+        step = ""
+        if "iter" in results:
+            step = "step {} ({} samples) ".format(results["iter"][i], results["n_resources"][i])
+        print("    {}fit {:7.1f}s  score {:.4f} +/- {:.4f}  {}".format(step, results["mean_fit_time"][i],
+                                                                      results["mean_test_score"][i],
+                                                                      results["std_test_score"][i], params))
+    print("    Best score {:.4f}: {}".format(model.best_score_, model.best_params_))
+
+# Scores of the predictions
+def report_scores(Y_test, Y_pred, category_names, verbose = True):
+    """
+    Method for scoring predictions of every category
+    
+    Args:
+        Y_test (numpy ndarray): Test output dataset
+        Y_pred (numpy ndarray): Predicted output
+        category_names (list): Labels for categories
+        verbose (bool): Print the report and the accuracy of every category
+    
+    output:
+        report (dict): classification_report of every category and the averages,
+            e.g. report["related"]["f1-score"]
+    """
+    
+    report = classification_report(Y_test, Y_pred, target_names = category_names, output_dict = True, zero_division = 0)
+    if verbose:
+        print(classification_report(Y_test, Y_pred, target_names = category_names, zero_division = 0))
+        print("..................................................")
+        for i in range(Y_test.shape[1]):
+            print("%25s accuracy : %.2f" %(category_names[i], accuracy_score(Y_test[:, i], Y_pred[:, i])))
+
+    return report
+
 # ML Model evaluation
-def evaluate_model(model, X_test, Y_test, category_names):
+def evaluate_model(model, X_test, Y_test, category_names, verbose = True):
     """
     Method for evaluating model performance
     
@@ -107,45 +407,319 @@ def evaluate_model(model, X_test, Y_test, category_names):
         model (dict of numpy ndarray): Classifier model
         X_test (numpy ndarray): Test input dataset
         Y_test (numpy ndarray): Test output dataset
+        category_names (list): Labels for categories
+        verbose (bool): Print the report and the accuracy of every category
     
     output:
-        None
+        report (dict): classification_report of every category and the averages,
+            e.g. report["related"]["f1-score"]
     """
     
     Y_pred = model.predict(X_test)
     
-    print(classification_report(Y_test, Y_pred, target_names = category_names))
-    print("..................................................")
-    for i in range(Y_test.shape[1]):
-        print("%25s accuracy : %.2f" %(category_names[i], accuracy_score(Y_test[:, i], Y_pred[:, i])))
+    return report_scores(Y_test, Y_pred, category_names, verbose)
+
+# Stream the messages table
+def read_batches(database_filepath, holdout, batch_size = 10000):
+    """
+    Method for reading the messages of the sqlite database a batch at a time
+    
+    Every fifth message by id (id % 5 == 0) is held out for evaluation.
+    
+    Args:
+        database_filepath (str): sqlite db filepath
+        holdout (bool): Read the held out messages instead of the training messages
+        batch_size (int): Messages per batch
+        
+    Yields:
+        X (numpy.ndarray): Messages of the batch
+        Y (numpy.ndarray): Categories of the batch
+        category_names (list): Labels for categories
+    """
+    
+    engine = create_engine("sqlite:///{}".format(database_filepath))
+    query = "SELECT * FROM messages WHERE id % 5 {} 0".format("=" if holdout else "!=")
+    with engine.connect() as connection:
+        for df in pd.read_sql_query(query, con = connection, chunksize = batch_size):
+            yield df.message.to_numpy(dtype = object), df[df.columns[4:]].to_numpy(), list(df.columns[4:])
+
+# Train ML Model a batch at a time
+def train_out_of_core(database_filepath, n_features = 2 ** 18, batch_size = 10000, epochs = 1):
+    """
+    Method for training a hashing vectorizer and SGD classifiers over the database in batches
+    
+    Only one batch of messages is in memory at a time. The hashing vectorizer has no
+    vocabulary to fit, the tfidf step is left out since idf needs every message first
+    and the hashed counts are l2 normalized instead.
+    
+    Args:
+        database_filepath (str): sqlite db filepath
+        n_features (int): Number of features of the hashing vectorizer
+        batch_size (int): Messages per batch
+        epochs (int): Passes over the training messages
+        
+    output:
+        model (Pipeline): Hashing vectorizer and classifier
+        category_names (list): Labels for categories
+    """
+    
+    vect = HashingVectorizer(analyzer=tokenize, n_features = n_features, alternate_sign = False)
+    clf = MultiOutputClassifier(SGDClassifier(loss = "modified_huber", random_state = 0))
+    
+    category_names = None
+    for epoch in range(epochs):
+        n_messages = 0
+        for X, Y, category_names in read_batches(database_filepath, holdout = False, batch_size = batch_size):
+            # Every category is 0 or 1, a batch does not need to hold both
+            clf.partial_fit(vect.transform(X), Y, classes = [np.array([0, 1])] * Y.shape[1])
+            n_messages += len(X)
+        print('    Epoch {}: {:,} messages'.format(epoch + 1, n_messages))
+    
+    if category_names is None:
+        raise ValueError("no training messages in {}".format(database_filepath))
+    
+    # Hashes of tokens never seen keep a zero weight, sparse weights keep the saved model small
+    for estimator in clf.estimators_:
+        estimator.sparsify()
+    
+    return Pipeline([('vect', vect), ('clf', clf)]), category_names
+
+# ML Model evaluation a batch at a time
+def evaluate_out_of_core(model, database_filepath, batch_size = 10000):
+    """
+    Method for evaluating the model on the held out messages of the database
+    
+    Args:
+        model (Pipeline): Model of train_out_of_core
+        database_filepath (str): sqlite db filepath
+        batch_size (int): Messages per batch
+    
+    output:
+        report (dict): classification_report of every category and the averages
+    """
+    
+    Y_test, Y_pred = [], []
+    for X, Y, category_names in read_batches(database_filepath, holdout = True, batch_size = batch_size):
+        Y_test.append(Y)
+        Y_pred.append(model.predict(X))
+    
+    return report_scores(np.concatenate(Y_test), np.concatenate(Y_pred), category_names)
+
+# Formats of the saved model:
+#   mmap: uncompressed, the default, the fastest to load and the arrays can be memory
+#         mapped by joblib.load(mmap_mode = "r")
+#   compressed: zlib compressed, the smallest file, decompressing a forest takes two to
+#               five times the load time of the uncompressed file
+ARTIFACTS = ("mmap", "compressed")
+
+# Classify raw messages with the fitted model
+def with_tokenizer(model):
+    """
+    Method for setting the tokenizer as the analyzer of a model trained on token lists
+    
+    The vocabulary and the weights do not change, the model then takes raw messages
+    like the app sends them.
+    
+    Args:
+        model: Fitted search or pipeline
+        
+    output:
+        model (Pipeline): Best pipeline taking raw messages
+    """
+    
+    model = getattr(model, "best_estimator_", model)
+    model.set_params(vect__analyzer = tokenize)
+    
+    return model
+
+# Slim the model down for saving
+def slim_model(model):
+    """
+    Method for keeping only what predict needs of the fitted model
+    
+    The search results are dropped for the refit best pipeline, which gets the
+    tokenizer as its analyzer. Linear weights over hashed features are made sparse
+    like train_out_of_core does, other dense linear weights are stored as float32.
+    The vocabulary is pickled as one string by CompactCountVectorizer. Tree
+    thresholds and values stay float64, scikit-learn trees only take float64.
+    
+    Args:
+        model: Fitted search or pipeline
+        
+    output:
+        model (Pipeline): Pipeline for predicting
+    """
+    
+    model = with_tokenizer(model)
+    
+    hashing = isinstance(model.named_steps["vect"], HashingVectorizer)
+    clf = model.named_steps["clf"]
+    for estimator in getattr(clf, "estimators_", [clf]):
+        if not isinstance(getattr(estimator, "coef_", None), np.ndarray):
+            continue
+        # Hashes of tokens never seen keep a zero weight, most of the n_features weights are 0.
+        # Sparse weights stay float64, sparse products need one dtype
+        if hashing:
+            estimator.sparsify()
+        else:
+            estimator.coef_ = estimator.coef_.astype(np.float32)
+            estimator.intercept_ = estimator.intercept_.astype(np.float32)
+    
+    return model
 
 # Store the model
-def save_model(model, model_filepath):
+def save_model(model, model_filepath, artifact = "mmap"):
     """
-    Method for saving the model in pickle file
+    Method for saving the slimmed model in pickle file
+    
+    Args:
+        model: Fitted search or pipeline
+        model_filepath (str): Pickle file path
+        artifact (str): "mmap" or "compressed", see ARTIFACTS
+        
+    output:
+        None
     """
     
-    joblib.dump(model, model_filepath)
+    if artifact not in ARTIFACTS:
+        raise ValueError("artifact must be one of {}, got {!r}".format(ARTIFACTS, artifact))
+    
+    # Written next to the model and moved over it, a running app never loads a half written file
+    temporary_filepath = model_filepath + ".tmp"
+    joblib.dump(slim_model(model), temporary_filepath, compress = 3 if artifact == "compressed" else 0)
+    os.replace(temporary_filepath, model_filepath)
+
+# Size and load time of a saved model
+def measure_artifact(model_filepath, mmap_mode = None):
+    """
+    Method for measuring the size and the load time of a saved model
+    
+    output:
+        size (int): File size in bytes
+        seconds (float): Time of joblib.load
+    """
+    
+    start = time.perf_counter()
+    joblib.load(model_filepath, mmap_mode = mmap_mode)
+    seconds = time.perf_counter() - start
+    
+    return os.path.getsize(model_filepath), seconds
+
+# Store the model and report it
+def save_and_report(model, model_filepath, artifact = "mmap", compare = False):
+    """
+    Method for saving the model and printing its size and load time
+
+    Args:
+        model: Fitted search or pipeline
+        model_filepath (str): Pickle file path
+        artifact (str): "mmap" or "compressed", see ARTIFACTS
+        compare (bool): Also measure the whole model saved like before, without slimming,
+            and the slimmed model saved in the other format
+    """
+
+    artifacts = []
+    if compare:
+        # Saved before slim_model changes the model
+        full_filepath = model_filepath + ".full"
+        joblib.dump(model, full_filepath)
+        artifacts.append(("full pickle", measure_artifact(full_filepath)))
+        os.remove(full_filepath)
+
+    save_model(model, model_filepath, artifact)
+    artifacts.append((artifact, measure_artifact(model_filepath, "r" if artifact == "mmap" else None)))
+
+    if compare:
+        other = ARTIFACTS[1 - ARTIFACTS.index(artifact)]
+        other_filepath = model_filepath + "." + other
+        save_model(model, other_filepath, other)
+        artifacts.append((other, measure_artifact(other_filepath, "r" if other == "mmap" else None)))
+        os.remove(other_filepath)
+
+    for name, (size, seconds) in artifacts:
+        print('    {:>12}: {:10.2f} MB, loaded in {:.3f}s'.format(name, size / 2 ** 20, seconds))
+    if compare:
+        print('    compressed is the smaller file, mmap (uncompressed) loads faster')
+
+# Command line arguments
+def parse_args(args):
+    parser = argparse.ArgumentParser(description = 'Train the disaster messages classifier',
+                                     epilog = 'Example: python train_classifier.py ../data/DisasterResponse.db classifier.pkl')
+    parser.add_argument('database_filepath', help = 'sqlite database, or a .parquet/.feather/.arrow file')
+    parser.add_argument('model_filepath', help = 'pickle file to save the model to')
+    parser.add_argument('--token-cache', metavar = 'DIR',
+                        help = 'directory to save the tokenized messages to and reuse them from')
+    parser.add_argument('--search', choices = SEARCH_STRATEGIES, default = 'grid',
+                        help = 'hyperparameter search, grid (default), successive halving or random')
+    parser.add_argument('--time-budget', type = float, metavar = 'SECONDS',
+                        help = 'time budget of the random search')
+    parser.add_argument('--n-iter', type = int, default = 20, help = 'most candidates of the random search')
+    parser.add_argument('--estimator', choices = ESTIMATORS, default = 'multioutput',
+                        help = 'a forest per category (default), one multi-output forest or linear SGD classifiers')
+    parser.add_argument('--vectorizer', choices = VECTORIZERS, default = 'count',
+                        help = 'token counts with a vocabulary (default) or hashed into --n-features')
+    parser.add_argument('--n-features', type = int, default = 2 ** 18, help = 'features of the hashing vectorizer')
+    parser.add_argument('--out-of-core', action = 'store_true',
+                        help = 'train a hashing vectorizer and SGD classifiers over the sqlite database '
+                               'in batches, every fifth message by id is held out')
+    parser.add_argument('--batch-size', type = int, default = 10000, help = 'messages per batch with --out-of-core')
+    parser.add_argument('--epochs', type = int, default = 1, help = 'passes over the messages with --out-of-core')
+    parser.add_argument('--artifact', choices = ARTIFACTS, default = 'mmap',
+                        help = 'uncompressed, the fastest to load and memory mappable (default), '
+                               'or compressed, the smallest file')
+    parser.add_argument('--compare-artifact', action = 'store_true',
+                        help = 'also report the size and load time of the other artifact and of '
+                               'the whole model pickled without slimming')
+    return parser.parse_args(args)
 
 # Main function
 def main():
-    if len(sys.argv) == 3:
-        database_filepath, model_filepath = sys.argv[1:]
+    if len(sys.argv) >= 3:
+        args = parse_args(sys.argv[1:])
+        database_filepath, model_filepath = args.database_filepath, args.model_filepath
+
+        if args.out_of_core:
+            if database_filepath.endswith(COLUMNAR_EXTENSIONS):
+                sys.exit('--out-of-core reads the sqlite database, got {}'.format(database_filepath))
+
+            print('Training model in batches...\n    DATABASE: {}'.format(database_filepath))
+            start = time.perf_counter()
+            model, category_names = train_out_of_core(database_filepath, args.n_features, args.batch_size, args.epochs)
+            print('    Trained in {:.1f}s'.format(time.perf_counter() - start))
+
+            print('Evaluating model...')
+            evaluate_out_of_core(model, database_filepath, args.batch_size)
+
+            print('Saving model...\n    MODEL: {}'.format(model_filepath))
+            save_and_report(model, model_filepath, args.artifact, args.compare_artifact)
+
+            print('Trained model saved!')
+            return
+
         print('Loading data...\n    DATABASE: {}'.format(database_filepath))
         X, Y, category_names = load_data(database_filepath)
+
+        print('Tokenizing messages...')
+        X = tokenize_corpus(X, args.token_cache)
         X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=0.2)
 
         print('Building model...')
-        model = build_model()
+        # Successive halving starts the 6 candidates on a ninth of the samples
+        model = build_model(search = args.search, time_budget = args.time_budget, n_iter = args.n_iter,
+                            min_resources = max(len(X_train) // 9, 100), estimator = args.estimator,
+                            vectorizer = args.vectorizer, n_features = args.n_features)
 
         print('Training model...')
+        start = time.perf_counter()
         model.fit(X_train, Y_train)
+        print('    Trained in {:.1f}s'.format(time.perf_counter() - start))
+        log_search(model)
 
         print('Evaluating model...')
         evaluate_model(model, X_test, Y_test, category_names)
 
         print('Saving model...\n    MODEL: {}'.format(model_filepath))
-        save_model(model, model_filepath)
+        save_and_report(model, model_filepath, args.artifact, args.compare_artifact)
 
         print('Trained model saved!')
 
@@ -157,4 +731,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
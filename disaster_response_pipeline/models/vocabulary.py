@@ -0,0 +1,31 @@
+# Import libraries
+from sklearn.feature_extraction.text import CountVectorizer
+
+# Count vectorizer saved inside the model, the app unpickles it from this module
+class CompactCountVectorizer(CountVectorizer):
+    """
+    CountVectorizer whose fitted vocabulary is pickled as one string
+
+    The vocabulary_ dict pickles every term with its feature index and a memo entry.
+    The feature indices of a fitted vocabulary are 0 to n - 1, so the terms joined
+    by newlines in index order are enough to rebuild vocabulary_ when the model is
+    loaded. A vocabulary with a term containing a newline is pickled as the dict.
+    """
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        vocabulary = state.get("vocabulary_")
+        if vocabulary and not any("\n" in term for term in vocabulary):
+            terms = [None] * len(vocabulary)
+            for term, index in vocabulary.items():
+                terms[index] = term
+            state = dict(state)
+            state["vocabulary_"] = "\n".join(terms)
+        return state
+
+    def __setstate__(self, state):
+        vocabulary = state.get("vocabulary_")
+        if isinstance(vocabulary, str):
+            terms = vocabulary.split("\n")
+            state = dict(state, vocabulary_ = dict(zip(terms, range(len(terms)))))
+        super().__setstate__(state)